@@ -0,0 +1,206 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pygame
+
+from planet import Planet, CloudManager
+from planet_config import PRESETS
+from orbits import OrbitalState
+from projection import ShadowMask
+from terrain_noise import generate_noise_map
+
+# Headless micro-benchmarks for the per-planet hot paths.
+#
+#   python benchmark.py --out results.json
+#   python benchmark.py --baseline results.json   # compare, exit 1 on regression
+
+DEFAULT_RADII = [25, 50, 100, 200, 400]
+
+def percentile(sorted_samples, q):
+    idx = min(len(sorted_samples) - 1, int(math.ceil(q * len(sorted_samples))) - 1)
+    return sorted_samples[max(0, idx)]
+
+def measure(fn, min_time=0.2, min_calls=5, max_calls=1000):
+    # Warm up once (fills caches, first-touch allocations)
+    fn()
+
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_calls:
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+        if len(samples) >= min_calls and time.perf_counter() - start >= min_time:
+            break
+    samples.sort()
+
+    # Separate pass: tracemalloc slows everything down, so it must not
+    # overlap with the timed calls. Reports bytes allocated (peak) per call
+    # by Python and NumPy; SDL surface memory is not visible to tracemalloc.
+    alloc_calls = min(len(samples), 20)
+    tracemalloc.start()
+    peak_total = 0
+    for _ in range(alloc_calls):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - base
+    tracemalloc.stop()
+
+    return {
+        'calls': len(samples),
+        'min_ms': samples[0] * 1000,
+        'median_ms': percentile(samples, 0.5) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'alloc_bytes': peak_total // alloc_calls,
+    }
+
+def make_config(preset, radius=None):
+    config = PRESETS[preset]()
+    if radius is not None:
+        config.radius = radius
+    return config
+
+def bench_preset(preset, radii, min_time, seed=0):
+    results = {}
+    planet = Planet(make_config(preset), seed)
+
+    results[f'generate_base_map/{preset}'] = measure(
+        lambda: planet.generate_base_map(planet.tex_w, planet.tex_h), min_time)
+
+    noise_config = make_config(preset)
+    results[f'generate_noise_map/{preset}/2048x1024'] = measure(
+        lambda: generate_noise_map(noise_config, seed, 2048, 1024), min_time)
+
+    clouds = CloudManager(planet.tex_w, planet.tex_h, planet.config.weather_speed,
+                          planet.config.c_cloud, planet.config.num_clouds,
+                          rng=np.random.default_rng(seed))
+    frame = [0]
+    def cloud_update():
+        frame[0] += 1
+        clouds.update((frame[0] * 0.003) % 1.0)
+    results[f'cloud_update/{preset}'] = measure(cloud_update, min_time)
+
+    results[f'planet_update/{preset}'] = measure(planet.update, min_time)
+
+    for radius in radii:
+        config = make_config(preset, radius)
+        if config.dither_shadows:
+            results[f'normals/{preset}/r{radius}'] = measure(lambda: ShadowMask(radius), min_time)
+
+        body = Planet(config, seed)
+        body.update()
+        target = pygame.Surface((radius * 2 + 64, radius * 2 + 64))
+        # Light sweeps slowly, like a planet orbiting the sun in main()
+        angle = [0.0]
+        def draw():
+            angle[0] += 0.001
+            light = (math.cos(angle[0]), math.sin(angle[0]), 0.25)
+            body.draw(target, radius + 32, radius + 32, light)
+        results[f'draw/{preset}/r{radius}'] = measure(draw, min_time)
+        cache = body.shadow_cache
+        if cache is not None:
+            # How often the sweeping light could reuse a shadow overlay
+            results[f'draw/{preset}/r{radius}'].update(
+                shadow_hits=cache.hits, shadow_misses=cache.misses, shadow_hit_rate=cache.hit_rate())
+
+    return results
+
+def bench_orbits(count, min_time):
+    # One batched orbit step (positions and light vectors) for count bodies
+    orbits = OrbitalState(count)
+    for _ in range(count):
+        d = random.uniform(300, 3000)
+        orbits.add(d, 0.02 / math.sqrt(d), random.uniform(0, 2 * math.pi))
+    return {f'orbits_advance/{count}': measure(orbits.advance, min_time)}
+
+def run(presets, radii, min_time=0.2, seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+    results = {}
+    for preset in presets:
+        print(f'[{preset}]', file=sys.stderr)
+        results.update(bench_preset(preset, radii, min_time, seed))
+    results.update(bench_orbits(100000, min_time))
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'presets': presets,
+            'radii': radii,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+def print_table(results, baseline=None):
+    print(f"{'benchmark':<42}{'min ms':>10}{'median ms':>11}{'p95 ms':>10}{'alloc KiB':>11}{'shadow hit':>12}" +
+          (f"{'vs base':>10}" if baseline else ''))
+    for name, r in results.items():
+        hit_rate = f"{r['shadow_hit_rate']:.1%}" if 'shadow_hit_rate' in r else '-'
+        line = (f"{name:<42}{r['min_ms']:>10.3f}{r['median_ms']:>11.3f}{r['p95_ms']:>10.3f}"
+                f"{r['alloc_bytes'] / 1024:>11.1f}{hit_rate:>12}")
+        if baseline:
+            base = baseline.get(name)
+            line += f"{r['median_ms'] / base['median_ms']:>9.2f}x" if base else f"{'new':>10}"
+        print(line)
+
+def compare(results, baseline, threshold):
+    # A benchmark regresses when its median is more than `threshold` slower
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base and r['median_ms'] > base['median_ms'] * (1.0 + threshold):
+            regressions.append((name, base['median_ms'], r['median_ms']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless planet generation/rendering benchmarks")
+    parser.add_argument('--presets', nargs='+', default=list(PRESETS), choices=list(PRESETS))
+    parser.add_argument('--radii', nargs='+', type=int, default=DEFAULT_RADII)
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds spent timing each benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="write results as JSON to this file")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="allowed median slowdown before a benchmark counts as a regression")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    report = run(args.presets, args.radii, args.min_time, args.seed)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    print_table(report['results'], baseline)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if baseline:
+        regressions = compare(report['results'], baseline, args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms")
+        if regressions:
+            return 1
+    pygame.quit()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
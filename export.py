@@ -0,0 +1,156 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import dataclasses
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import pygame
+
+from planet import Planet
+from planet_config import PlanetConfig, PRESETS
+
+# Headless batch export of planet sprite sheets.
+#
+#   python export.py --preset terran gas_giant --count 100 --out assets/
+#   python export.py --config my_planet.json --seeds 1 2 3 --light 1,0,0.25 -1,0,0.25
+#
+# Each planet gets one PNG per lighting: a grid of rotation frames, left to
+# right, top to bottom, a full turn over --frames cells. The front-lit sheet
+# is always written; every --light adds a shaded variant (bodies drawn
+# without shadows, like stars, look the same under any light and only get
+# the front-lit sheet).
+
+FRONT_LIGHT = (0.0, 0.0, 1.0)
+
+def load_config(path):
+    # JSON object of PlanetConfig fields; "preset" picks the starting point
+    with open(path) as f:
+        data = json.load(f)
+    config = PRESETS[data.pop('preset', 'terran')]()
+    for field in dataclasses.fields(PlanetConfig):
+        if field.name in data:
+            value = data.pop(field.name)
+            # Colours come back from JSON as lists
+            setattr(config, field.name, tuple(value) if isinstance(value, list) else value)
+    if data:
+        raise ValueError(f"{path}: unknown config fields {sorted(data)}")
+    return config
+
+def parse_light(text):
+    x, y, z = (float(v) for v in text.split(','))
+    return (x, y, z)
+
+def render_sheet(planet, frames, columns, light):
+    cell_w, cell_h = planet.disc.get_size()
+    rows = math.ceil(frames / columns)
+    sheet = pygame.Surface((cell_w * columns, cell_h * rows), pygame.SRCALPHA)
+    sheet.fill((0, 0, 0, 0))
+    for i in range(frames):
+        # Weather moves on by one tick per frame; the angle is set exactly
+        planet.update()
+        planet.rotation_angle = 360.0 * i / frames
+        cx = (i % columns) * cell_w + planet.radius
+        cy = (i // columns) * cell_h + planet.radius
+        # Always full detail: draw() would let LOD pick a reduced level
+        planet.paint(sheet, cx, cy, planet.render_full(light))
+    return sheet
+
+def export_one(job):
+    # Runs in a worker. Only file names travel back, never pixels.
+    name, config, seed, frames, columns, lights, out_dir = job
+    base = Planet(config, seed)
+    files = []
+    if not config.dither_shadows:
+        lights = []
+    for k, light in enumerate([FRONT_LIGHT] + lights):
+        # A fresh planet per lighting so every sheet shows the same weather
+        planet = base if k == 0 else Planet(config, seed, base_texture=base.base_texture,
+                                            shadow_mask=base.shadow_mask)
+        sheet = render_sheet(planet, frames, columns, light)
+        suffix = 'front' if k == 0 else f'light{k}'
+        path = os.path.join(out_dir, f'{name}_{seed}_{suffix}.png')
+        pygame.image.save(sheet, path)
+        files.append({'file': os.path.basename(path), 'light': list(light)})
+    return {
+        'name': name,
+        'seed': seed,
+        'cell': list(planet.disc.get_size()),
+        'frames': frames,
+        'columns': columns,
+        'sheets': files,
+    }
+
+def jobs(sources, seeds, frames, columns, lights, out_dir):
+    for name, config in sources:
+        for seed in seeds:
+            yield (name, config, seed, frames, columns, lights, out_dir)
+
+def run(job_iter, workers, max_pending):
+    # Keeps at most max_pending jobs in flight so memory stays bounded
+    # however many planets are requested
+    results = []
+    start = time.perf_counter()
+    if workers <= 1:
+        for job in job_iter:
+            results.append(export_one(job))
+            report(len(results), start)
+        return results, time.perf_counter() - start
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for job in job_iter:
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results.append(future.result())
+                    report(len(results), start)
+            pending.add(pool.submit(export_one, job))
+        for future in wait(pending).done:
+            results.append(future.result())
+            report(len(results), start)
+    return results, time.perf_counter() - start
+
+def report(done, start, every=25):
+    if done % every == 0:
+        elapsed = time.perf_counter() - start
+        print(f"{done} planets, {done / elapsed:.1f} planets/sec", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render planet rotation sprite sheets to PNG")
+    parser.add_argument('--preset', nargs='+', default=[], choices=list(PRESETS))
+    parser.add_argument('--config', nargs='+', default=[], metavar='FILE', help="JSON file of PlanetConfig fields")
+    parser.add_argument('--seeds', nargs='+', type=int, help="explicit seeds (overrides --seed-start/--count)")
+    parser.add_argument('--seed-start', type=int, default=0)
+    parser.add_argument('--count', type=int, default=1, help="planets per preset/config")
+    parser.add_argument('--frames', type=int, default=32, help="rotation frames per sheet")
+    parser.add_argument('--columns', type=int, default=8)
+    parser.add_argument('--light', nargs='+', type=parse_light, default=[], metavar='X,Y,Z',
+                        help="extra shaded sheets lit from these directions")
+    parser.add_argument('--out', default='export')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max-pending', type=int, help="jobs in flight at once (default 2 per worker)")
+    args = parser.parse_args(argv)
+
+    sources = [(name, PRESETS[name]()) for name in args.preset]
+    sources += [(os.path.splitext(os.path.basename(path))[0], load_config(path)) for path in args.config]
+    if not sources:
+        parser.error("give at least one --preset or --config")
+    seeds = args.seeds if args.seeds else list(range(args.seed_start, args.seed_start + args.count))
+    os.makedirs(args.out, exist_ok=True)
+
+    pygame.init()
+    results, elapsed = run(jobs(sources, seeds, args.frames, args.columns, args.light, args.out),
+                           args.workers, args.max_pending or 2 * args.workers)
+    with open(os.path.join(args.out, 'manifest.json'), 'w') as f:
+        json.dump(sorted(results, key=lambda r: (r['name'], r['seed'])), f, indent=2)
+    print(f"{len(results)} planets in {elapsed:.2f} s ({len(results) / elapsed:.1f} planets/sec)")
+    pygame.quit()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import numpy as np
+import pygame
+
+# AI traffic: many ships flying between planets, simulated together as
+# arrays. Every ship follows the Spaceship model exactly (rotate, thrust
+# along the heading, friction, move); only the keyboard is replaced by a
+# steering rule that turns towards the target planet and thrusts once
+# roughly facing it. A ship that arrives picks another planet.
+
+class Fleet:
+    def __init__(self, count, targets, seed, thrust_power=0.15, friction=0.96, rotation_speed=5.0,
+                 steer_tolerance=6.0, thrust_cone=30.0, arrive=60.0,
+                 color=(200, 200, 170), nose_color=(150, 150, 150)):
+        # targets: indices (into positions passed to update) ships fly between.
+        # Physics constants default to the player's Spaceship.
+        self.targets = np.asarray(targets, dtype=np.intp)
+        self.rng = rng = np.random.default_rng(seed)
+        self.thrust_power = thrust_power
+        self.friction = friction
+        self.rotation_speed = rotation_speed
+        self.steer_tolerance = steer_tolerance
+        self.thrust_cone = thrust_cone
+        self.arrive = arrive
+        self.color = color
+        self.nose_color = nose_color
+
+        self.count = count
+        self.x = np.zeros(count)
+        self.y = np.zeros(count)
+        self.vx = np.zeros(count)
+        self.vy = np.zeros(count)
+        self.angle = rng.uniform(0, 360, count)   # degrees, 0 is right, 90 is up
+        self.thrust = np.zeros(count, dtype=bool)
+        self.target = rng.integers(0, len(self.targets), count)
+        self.arrivals = 0
+        self.drawn = 0
+
+    def spawn(self, xs, ys, spread=300.0):
+        # Scatter the ships around the given target positions
+        start = self.rng.integers(0, len(self.targets), self.count)
+        self.x[:] = xs[self.targets[start]] + self.rng.uniform(-spread, spread, self.count)
+        self.y[:] = ys[self.targets[start]] + self.rng.uniform(-spread, spread, self.count)
+
+    def update(self, xs, ys):
+        # xs, ys: world positions of every body (targets index into them)
+        goal = self.targets[self.target]
+        dx = xs[goal] - self.x
+        dy = ys[goal] - self.y
+
+        # New destinations for ships that made it
+        arrived = dx * dx + dy * dy < self.arrive * self.arrive
+        if arrived.any() and len(self.targets) > 1:
+            n = int(arrived.sum())
+            self.target[arrived] = (self.target[arrived] + self.rng.integers(1, len(self.targets), n)) % len(self.targets)
+            self.arrivals += n
+
+        # Steering: the inputs Spaceship.handle_input would get
+        want = np.degrees(np.arctan2(-dy, dx))   # screen y points down
+        diff = (want - self.angle + 180) % 360 - 180
+        self.angle += self.rotation_speed * ((diff > self.steer_tolerance).astype(np.float64) -
+                                             (diff < -self.steer_tolerance))
+        self.thrust = np.abs(diff) < self.thrust_cone
+
+        # Spaceship.update
+        rad = np.radians(self.angle)
+        self.vx += np.where(self.thrust, np.cos(rad) * self.thrust_power, 0.0)
+        self.vy += np.where(self.thrust, -np.sin(rad) * self.thrust_power, 0.0)
+        self.vx *= self.friction
+        self.vy *= self.friction
+        self.x += self.vx
+        self.y += self.vy
+
+    def draw(self, surface, camera_x, camera_y):
+        # All ships on screen in one pixel write: a body pixel plus a nose
+        # pixel two steps along the heading. Returns the canvas rect touched
+        # (None when no ship is visible).
+        w, h = surface.get_size()
+        ix = (self.x - camera_x).astype(np.intp)
+        iy = (self.y - camera_y).astype(np.intp)
+        visible = (ix >= 0) & (ix < w) & (iy >= 0) & (iy < h)
+        self.drawn = int(visible.sum())
+        if not self.drawn:
+            return None
+        ix, iy = ix[visible], iy[visible]
+        rad = np.radians(self.angle[visible])
+        nose_x = ix + np.cos(rad) * 2
+        nose_y = iy - np.sin(rad) * 2
+        nose = (nose_x >= 0) & (nose_x < w) & (nose_y >= 0) & (nose_y < h)
+
+        pixels = pygame.surfarray.pixels2d(surface)
+        pixels[ix, iy] = surface.map_rgb(self.color)
+        pixels[nose_x[nose].astype(np.intp), nose_y[nose].astype(np.intp)] = surface.map_rgb(self.nose_color)
+        del pixels
+
+        left, top = int(ix.min()) - 2, int(iy.min()) - 2
+        return pygame.Rect(left, top, int(ix.max()) + 3 - left, int(iy.max()) + 3 - top)
@@ -0,0 +1,291 @@
+import math
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pygame
+from planet import Planet, GENERATOR_VERSION, generate_base_map, texture_size
+from planet_builder import build_parts
+from planet_config import PRESETS
+
+# Procedural galaxy beyond the home system. Space is cut into square chunks;
+# the systems of a chunk (a star plus planets drawn from the presets) are a
+# pure function of (galaxy seed, chunk x, chunk y). Chunks around the ship
+# and ahead of it are generated in a worker process (bodies already in the
+# texture cache are loaded instead), chunks left behind are dropped, and
+# bodies whose textures aren't ready yet draw as plain discs.
+# Built planets are updated by the caller's UpdateScheduler, like the home
+# system's (see planets()); draw() only draws.
+
+PLANET_PRESETS = [name for name in PRESETS if name not in ('sun', 'asteroid')]
+
+def build_chunk(specs):
+    # Runs in a worker: raw texture data for every body of a chunk
+    return [build_parts(spec) for spec in specs]
+
+class GalaxyBody:
+    def __init__(self, config, seed, x=0.0, y=0.0, dist=0.0, speed=0.0, angle=0.0):
+        self.config = config
+        self.seed = seed
+        self.radius = config.radius
+        # Planets orbit their system's star; stars have dist 0
+        self.dist = dist
+        self.speed = speed
+        self.angle = angle
+        self.x = x
+        self.y = y
+        self.planet = None
+
+class GalaxySystem:
+    def __init__(self, x, y, star, planets):
+        self.x = x
+        self.y = y
+        self.star = star
+        self.planets = planets
+        self.bodies = [star] + planets
+        self.extent = max(p.dist + p.radius for p in self.bodies)
+
+    def advance(self):
+        for p in self.planets:
+            p.angle += p.speed
+            p.x = self.x + math.cos(p.angle) * p.dist
+            p.y = self.y + math.sin(p.angle) * p.dist
+
+class Chunk:
+    def __init__(self, key, systems):
+        self.key = key
+        self.systems = systems
+        self.bodies = [b for s in systems for b in s.bodies]
+        self.future = None
+        self.cached = None    # per body: its base map from the texture cache, or None
+        self.parts = None     # base maps not yet turned into planets
+        self.next_body = 0
+
+    @property
+    def ready(self):
+        return self.next_body == len(self.bodies)
+
+class Galaxy:
+    def __init__(self, seed, chunk_size=16384, system_chance=0.5, keep_radius=1,
+                 lookahead_frames=300, max_chunks=24, workers=1, builds_per_frame=1,
+                 texture_cache=None, exclude=((0, 0),)):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.system_chance = system_chance
+        self.keep_radius = keep_radius
+        self.lookahead_frames = lookahead_frames
+        self.max_chunks = max_chunks
+        self.workers = workers
+        # Worker results of a chunk are turned into planets one body at a
+        # time in update(), at most this many per frame
+        self.builds_per_frame = builds_per_frame
+        self.texture_cache = texture_cache
+        self.exclude = set(exclude)
+        self.chunks = {}
+        self.executor = None
+        self.generated = 0
+        self.evicted = 0
+
+    def chunk_rng(self, cx, cy):
+        # String seeds hash the same way in every process and run
+        return random.Random(f'{self.seed}:{cx}:{cy}')
+
+    def layout(self, cx, cy):
+        # Deterministic systems of one chunk (cheap: no textures)
+        if (cx, cy) in self.exclude:
+            return []
+        rng = self.chunk_rng(cx, cy)
+        if rng.random() >= self.system_chance:
+            return []
+        # Keep systems clear of the chunk edges so they never overlap
+        margin = self.chunk_size / 4
+        sx = cx * self.chunk_size + rng.uniform(margin, self.chunk_size - margin)
+        sy = cy * self.chunk_size + rng.uniform(margin, self.chunk_size - margin)
+
+        star_config = PRESETS['sun']()
+        star_config.radius = rng.randint(60, 110)
+        star = GalaxyBody(star_config, rng.randrange(2**32), sx, sy)
+
+        planets = []
+        orbit = star_config.radius + 150
+        for _ in range(rng.randint(1, 4)):
+            orbit += rng.uniform(250, 550)
+            if orbit > margin - 200:
+                break
+            config = PRESETS[rng.choice(PLANET_PRESETS)]()
+            config.radius = rng.randint(25, 60)
+            angle = rng.uniform(0, 6.28)
+            planets.append(GalaxyBody(config, rng.randrange(2**32), sx + math.cos(angle) * orbit,
+                                      sy + math.sin(angle) * orbit, orbit, 0.02 / math.sqrt(orbit), angle))
+        return [GalaxySystem(sx, sy, star, planets)]
+
+    def wanted(self, pos, vel, heading):
+        # Chunks around the ship, around where it will be, and one ahead of its nose
+        c = self.chunk_size
+        points = [
+            (pos[0], pos[1]),
+            (pos[0] + vel[0] * self.lookahead_frames, pos[1] + vel[1] * self.lookahead_frames),
+            (pos[0] + heading[0] * c, pos[1] + heading[1] * c),
+        ]
+        keys = []
+        for x, y in points:
+            cx, cy = int(math.floor(x / c)), int(math.floor(y / c))
+            for dx in range(-self.keep_radius, self.keep_radius + 1):
+                for dy in range(-self.keep_radius, self.keep_radius + 1):
+                    key = (cx + dx, cy + dy)
+                    if key not in keys:
+                        keys.append(key)
+        return keys
+
+    def request(self, key):
+        chunk = Chunk(key, self.layout(*key))
+        self.chunks[key] = chunk
+        if not chunk.bodies:
+            return
+        chunk.cached = [self.cached_texture(b) for b in chunk.bodies]
+        specs = [(b.config, b.seed) for b, t in zip(chunk.bodies, chunk.cached) if t is None]
+        if not specs:
+            chunk.parts = chunk.cached
+            return
+        if self.executor is None:
+            # forkserver rather than fork, so no lock held by a render thread
+            # or SDL is copied into the workers
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context('forkserver'))
+        try:
+            chunk.future = self.executor.submit(build_chunk, specs)
+        except BrokenProcessPool:
+            self.close()
+            chunk.parts = chunk.cached
+        self.generated += 1
+
+    def cached_texture(self, body):
+        if self.texture_cache is None:
+            return None
+        return self.texture_cache.load(self.cache_key(body), texture_size(body.config))
+
+    def cache_key(self, body):
+        return self.texture_cache.key(body.config, body.seed, texture_size(body.config), GENERATOR_VERSION)
+
+    def evict(self, wanted, pos):
+        # Drop chunks nobody wants, farthest first, down to max_chunks
+        c = self.chunk_size
+        def distance(key):
+            return math.hypot((key[0] + 0.5) * c - pos[0], (key[1] + 0.5) * c - pos[1])
+        spare = sorted((k for k in self.chunks if k not in wanted), key=distance, reverse=True)
+        for key in spare:
+            if len(self.chunks) <= self.max_chunks:
+                break
+            chunk = self.chunks.pop(key)
+            if chunk.future is not None:
+                chunk.future.cancel()
+            self.evicted += 1
+
+    def update(self, pos, vel, heading):
+        # heading: unit vector the ship points along
+        wanted = self.wanted(pos, vel, heading)
+        for key in wanted:
+            if key not in self.chunks:
+                self.request(key)
+        self.evict(set(wanted), pos)
+
+        # Turn finished worker results into planets, a few per frame
+        budget = self.builds_per_frame
+        for key in wanted:
+            chunk = self.chunks[key]
+            if chunk.ready:
+                continue
+            if chunk.parts is None:
+                if not chunk.future.done():
+                    continue
+                chunk.parts = list(chunk.cached)
+                try:
+                    built = iter(chunk.future.result())
+                    chunk.parts = [next(built) if t is None else t for t in chunk.cached]
+                except Exception as e:
+                    # The worker raised, or died and broke the pool (a new
+                    # one is made for the next chunk): build these here
+                    if isinstance(e, BrokenProcessPool):
+                        self.close()
+                chunk.future = None
+            while budget > 0 and not chunk.ready:
+                body = chunk.bodies[chunk.next_body]
+                texture = chunk.parts[chunk.next_body]
+                if chunk.cached[chunk.next_body] is None:
+                    size = texture_size(body.config)
+                    if texture is None:
+                        texture = generate_base_map(body.config, body.seed, *size)
+                    else:
+                        texture = pygame.image.frombuffer(texture, size, 'RGB')
+                    if self.texture_cache is not None:
+                        self.texture_cache.store(self.cache_key(body), texture)
+                body.planet = Planet(body.config, body.seed, base_texture=texture)
+                chunk.next_body += 1
+                budget -= 1
+            if chunk.ready:
+                chunk.parts = chunk.cached = None
+
+        for chunk in self.chunks.values():
+            for system in chunk.systems:
+                system.advance()
+
+    def visible_systems(self, left, top, right, bottom):
+        for chunk in self.chunks.values():
+            for system in chunk.systems:
+                e = system.extent
+                if system.x + e > left and system.x - e < right and system.y + e > top and system.y - e < bottom:
+                    yield system
+
+    def planets(self, left, top, right, bottom, margin=0.0, warm_margin=0.0):
+        # Built planets whose body is within margin of the rectangle, and
+        # those further out but within warm_margin. Planets beyond that are
+        # left out: they stay dormant and catch up when next updated.
+        near, warm = [], []
+        reach = max(margin, warm_margin)
+        for chunk in self.chunks.values():
+            for system in chunk.systems:
+                e = system.extent + reach
+                if not (system.x + e > left and system.x - e < right and
+                        system.y + e > top and system.y - e < bottom):
+                    continue
+                for body in system.bodies:
+                    if body.planet is None:
+                        continue
+                    dx = max(left - body.x, 0.0, body.x - right)
+                    dy = max(top - body.y, 0.0, body.y - bottom)
+                    gap = max(dx, dy) - body.radius
+                    if gap < margin:
+                        near.append(body.planet)
+                    elif gap < warm_margin:
+                        warm.append(body.planet)
+        return near, warm
+
+    def draw(self, surface, camera_x, camera_y, scale):
+        # Returns the number of bodies drawn
+        w, h = surface.get_size()
+        drawn = 0
+        for system in self.visible_systems(camera_x, camera_y, camera_x + w, camera_y + h):
+            for body in system.bodies:
+                sc_x = int(body.x - camera_x)
+                sc_y = int(body.y - camera_y)
+                r = body.radius
+                if not (-r < sc_x < w + r and -r < sc_y < h + r):
+                    continue
+                if body is system.star:
+                    light = (0, 0, 1)
+                else:
+                    dx, dy = system.x - body.x, system.y - body.y
+                    dist = math.hypot(dx, dy)
+                    light = (dx / dist, dy / dist, 0.25)
+                drawn += 1
+                if body.planet is None:
+                    # Placeholder until the worker delivers the textures
+                    pygame.draw.circle(surface, body.config.c_ocean_shallow, (sc_x, sc_y), r)
+                    continue
+                body.planet.draw(surface, sc_x, sc_y, light, scale)
+        return drawn
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
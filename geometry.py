@@ -0,0 +1,65 @@
+import threading
+import weakref
+from collections import OrderedDict
+from projection import SphereProjection, ShadowMask
+
+# Process-wide registry of radius-dependent geometry (projection maps and
+# shadow normals). Every body of the same radius shares one read-only copy.
+# Entries live as long as some body holds them; the most recently requested
+# ones are also kept around unused so bodies that come and go (scene
+# streaming, LOD levels) don't rebuild them every time. RenderPool threads
+# reach it through lazily built LOD levels, so lookups hold a lock (an
+# entry is built at most once, by whichever thread asks first).
+
+class GeometryRegistry:
+    def __init__(self, keep_unused=16):
+        self.keep_unused = keep_unused
+        self.live = weakref.WeakValueDictionary()
+        self.recent = OrderedDict()
+        self.builds = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, factory):
+        with self.lock:
+            entry = self.live.get(key)
+            if entry is None:
+                entry = factory()
+                freeze(entry)
+                self.live[key] = entry
+                self.builds += 1
+            self.recent[key] = entry
+            self.recent.move_to_end(key)
+            while len(self.recent) > self.keep_unused:
+                self.recent.popitem(last=False)
+            return entry
+
+    def projection(self, radius, tex_w, tex_h):
+        return self.get(('projection', radius, tex_w, tex_h), lambda: SphereProjection(radius, tex_w, tex_h))
+
+    def shadow_mask(self, radius, mask=None):
+        # mask: an already built ShadowMask to adopt if the radius is new
+        return self.get(('shadow', radius), lambda: mask if mask is not None else ShadowMask(radius))
+
+    def memory_bytes(self):
+        return sum(entry.nbytes() for entry in list(self.live.values()))
+
+    def radii(self):
+        return sorted({key[1] for key in list(self.live.keys())})
+
+    def evict(self, radii=None):
+        # Stop keeping entries of these radii (all of them if None) around
+        # unused; ones a body still holds stay live
+        with self.lock:
+            if radii is None:
+                self.recent.clear()
+                return
+            for key in [k for k in self.recent if k[1] in radii]:
+                del self.recent[key]
+
+def freeze(entry):
+    # Shared between bodies: nobody may write into these arrays
+    for value in vars(entry).values():
+        if hasattr(value, 'flags'):
+            value.flags.writeable = False
+
+registry = GeometryRegistry()
@@ -0,0 +1,104 @@
+import math
+import weakref
+import pygame
+
+# Sprites of each body's last full-resolution render, reused (downscaled)
+# by secondary views such as the minimap and the system map. The main view
+# hands its render ops over as it draws, so a visible body costs the maps
+# one copy now and then; a body the main view doesn't show is rendered for
+# the maps only when its sprite has gone stale. A sprite is stale once the
+# body has turned, or its light has swung, past the thresholds.
+
+def normalized(v):
+    length = math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+    return (v[0] / length, v[1] / length, v[2] / length) if length else (0.0, 0.0, 1.0)
+
+class Impostor:
+    def __init__(self, size):
+        self.sprite = pygame.Surface(size, pygame.SRCALPHA)
+        self.angle = None
+        self.light = None
+        self.version = 0
+        # Downscaled copies per size: size -> (version, surface)
+        self.scaled = {}
+
+    def nbytes(self):
+        surfaces = [self.sprite] + [s for _, s in self.scaled.values()]
+        return sum(s.get_width() * s.get_height() * s.get_bytesize() for s in surfaces)
+
+class ImpostorCache:
+    MAX_SIZES = 4  # downscaled copies kept per body
+
+    def __init__(self, angle_threshold=6.0, light_threshold=5.0):
+        # Thresholds in degrees of rotation and of light direction
+        self.angle_threshold = angle_threshold
+        self.light_cos = math.cos(math.radians(light_threshold))
+        # Sprites go away with their planet (scene release)
+        self.entries = weakref.WeakKeyDictionary()
+        self.captures = 0    # refreshed from a main view render
+        self.refreshes = 0   # rendered just for a secondary view
+        self.rescales = 0
+
+    def entry(self, planet):
+        entry = self.entries.get(planet)
+        if entry is None:
+            entry = Impostor(planet.disc.get_size())
+            self.entries[planet] = entry
+        return entry
+
+    def stale(self, planet, entry, light_vector):
+        if entry.angle is None:
+            return True
+        drift = abs(planet.rotation_angle - entry.angle) % 360
+        if min(drift, 360 - drift) > self.angle_threshold:
+            return True
+        # Unshadowed bodies (the sun) look the same in any light
+        if planet.config.dither_shadows:
+            light = normalized(light_vector)
+            if sum(a * b for a, b in zip(light, entry.light)) < self.light_cos:
+                return True
+        return False
+
+    def store(self, planet, entry, light_vector, ops):
+        entry.sprite.fill((0, 0, 0, 0))
+        for kind, value, *extra in ops:
+            entry.sprite.blit(value, (0, 0))
+        entry.angle = planet.rotation_angle
+        entry.light = normalized(light_vector)
+        entry.version += 1
+
+    def capture(self, planet, light_vector, ops):
+        # ops: what planet.render just returned (only valid until its next
+        # render). Reduced levels and flat fills are not worth keeping.
+        if planet.lod.current != 0 or not ops or ops[0][0] != 'blit':
+            return
+        entry = self.entry(planet)
+        if self.stale(planet, entry, light_vector):
+            self.store(planet, entry, light_vector, ops)
+            self.captures += 1
+
+    def sprite(self, planet, light_vector, size):
+        # The body as a size x size sprite (at most its full size)
+        entry = self.entry(planet)
+        if self.stale(planet, entry, light_vector):
+            self.store(planet, entry, light_vector, planet.render_full(light_vector))
+            self.refreshes += 1
+        if size >= entry.sprite.get_width():
+            return entry.sprite
+
+        version, scaled = entry.scaled.get(size, (None, None))
+        if scaled is None:
+            if len(entry.scaled) >= self.MAX_SIZES:
+                entry.scaled.clear()
+            scaled = pygame.Surface((size, size), pygame.SRCALPHA)
+        if version != entry.version:
+            pygame.transform.smoothscale(entry.sprite, (size, size), scaled)
+            entry.scaled[size] = (entry.version, scaled)
+            self.rescales += 1
+        return scaled
+
+    def nbytes(self):
+        return sum(entry.nbytes() for entry in list(self.entries.values()))
+
+    def __len__(self):
+        return len(self.entries)
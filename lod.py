@@ -0,0 +1,158 @@
+import math
+import numpy as np
+import pygame
+from projection import ShadowCache, SHADOW_ALPHA
+from geometry import registry
+
+# Level-of-detail representations, from most to least detailed:
+#   0..max_level  textured projection at radius >> level, scaled up to size
+#   FLAT          flat disc in the body's average (shaded) colour
+#   PIXEL         a single screen pixel
+FLAT_DISC_RADIUS = 3.0   # on-screen radius (window px) below which FLAT is used
+PIXEL_RADIUS = 0.75      # on-screen radius below which PIXEL is used
+MIN_LEVEL_RADIUS = 4     # smallest radius a textured level is rendered at
+MIN_LEVEL_TEX_H = 8      # smallest texture mip height
+HYSTERESIS = 0.15        # relative size change needed before switching level
+
+def surface_bytes(surface):
+    if surface is None:
+        return 0
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+def downsample(src_rgb, dst_rgb):
+    # 2x2 box filter between two surfarray views
+    w, h = dst_rgb.shape[:2]
+    src = src_rgb[:w * 2, :h * 2].astype(np.uint16)
+    dst_rgb[...] = (src[0::2, 0::2] + src[1::2, 0::2] + src[0::2, 1::2] + src[1::2, 1::2] + 2) // 4
+
+class LodLevel:
+    # Everything needed to draw one textured level of a planet
+    def __init__(self, radius, texture, config):
+        self.radius = radius
+        self.texture = texture
+        tex_w, tex_h = texture.get_size()
+        self.projection = registry.projection(radius, tex_w, tex_h)
+        self.disc = pygame.Surface(self.projection.mask.shape, pygame.SRCALPHA)
+        pygame.surfarray.pixels_alpha(self.disc)[...] = self.projection.mask * 255
+        self.compose = pygame.Surface(self.projection.mask.shape, pygame.SRCALPHA)
+
+        self.shadow_cache = None
+        if config.dither_shadows:
+            self.shadow_cache = ShadowCache(registry.shadow_mask(radius), config.shadow_cache_step,
+                                            config.shadow_cache_size)
+
+    def nbytes(self):
+        total = surface_bytes(self.disc) + surface_bytes(self.compose)
+        if self.shadow_cache is not None:
+            total += self.shadow_cache.nbytes()
+        return total
+
+    def render(self, rot_norm, light_vector):
+        texture_rgb = pygame.surfarray.pixels3d(self.texture)
+        disc_rgb = pygame.surfarray.pixels3d(self.disc)
+        self.projection.project(texture_rgb, rot_norm, disc_rgb)
+        del texture_rgb, disc_rgb
+        if self.shadow_cache is None:
+            return self.disc
+        self.compose.fill((0, 0, 0, 0))
+        self.compose.blit(self.disc, (0, 0))
+        self.compose.blit(self.shadow_cache.get(light_vector), (0, 0))
+        return self.compose
+
+class PlanetLod:
+    # Mip chain of a planet's composite texture plus lazily built per-level
+    # projections, and the hysteresis state used to pick a level.
+    def __init__(self, planet):
+        self.planet = planet
+        self.levels = {}
+        self.current = 0
+        self.output = None
+
+        # Texture mips (level 0 is the planet's own composite texture)
+        self.mips = [planet.texture]
+        self.mip_version = [0]
+        w, h = planet.tex_w, planet.tex_h
+        while h // 2 >= MIN_LEVEL_TEX_H:
+            w, h = w // 2, h // 2
+            self.mips.append(pygame.Surface((w, h)))
+            self.mip_version.append(-1)
+
+        # Deepest textured level, limited by both radius and texture mips.
+        # A baked rotation atlas is already cheaper than any reduced level.
+        self.max_level = 0
+        if planet.rotation_atlas is None:
+            while ((planet.radius >> (self.max_level + 1)) >= MIN_LEVEL_RADIUS and
+                   self.max_level + 1 < len(self.mips)):
+                self.max_level += 1
+        self.flat = self.max_level + 1
+        self.pixel = self.max_level + 2
+
+        self.flat_mask = registry.shadow_mask(MIN_LEVEL_RADIUS) if planet.config.dither_shadows else None
+
+    def nbytes(self):
+        # Level 0 shares the planet's own texture and buffers
+        total = sum(surface_bytes(m) for m in self.mips[1:]) + surface_bytes(self.output)
+        total += sum(level.nbytes() for level in self.levels.values())
+        return total
+
+    def radii(self):
+        # Geometry radii this planet holds from the registry
+        return {self.planet.radius} | {level.radius for level in self.levels.values()}
+
+    def ideal(self, screen_radius):
+        if screen_radius < PIXEL_RADIUS:
+            return self.pixel
+        if screen_radius < FLAT_DISC_RADIUS:
+            return self.flat
+        level = int(math.floor(math.log2(self.planet.radius / screen_radius))) if screen_radius < self.planet.radius else 0
+        return min(level, self.max_level)
+
+    def select(self, scale):
+        screen_radius = self.planet.radius * scale
+        finer = self.ideal(screen_radius * (1 + HYSTERESIS))
+        coarser = self.ideal(screen_radius * (1 - HYSTERESIS))
+        # Only switch once the size has clearly left the current level's range
+        if not finer <= self.current <= coarser:
+            self.current = self.ideal(screen_radius)
+        return self.current
+
+    def mip(self, level):
+        # Rebuild stale mips from the level above (clouds change level 0)
+        version = self.planet.texture_version
+        self.mip_version[0] = version
+        for i in range(1, level + 1):
+            if self.mip_version[i] != version:
+                src = pygame.surfarray.pixels3d(self.mips[i - 1])
+                dst = pygame.surfarray.pixels3d(self.mips[i])
+                downsample(src, dst)
+                del src, dst
+                self.mip_version[i] = version
+        return self.mips[level]
+
+    def level(self, level):
+        if level not in self.levels:
+            self.levels[level] = LodLevel(self.planet.radius >> level, self.mip(level), self.planet.config)
+        return self.levels[level]
+
+    def render(self, level, rot_norm, light_vector):
+        # Textured level > 0: render small, scale up into a reused buffer
+        self.mip(level)
+        small = self.level(level).render(rot_norm, light_vector)
+        size = self.planet.disc.get_size()
+        if self.output is None:
+            self.output = pygame.Surface(size, pygame.SRCALPHA)
+        pygame.transform.scale(small, size, self.output)
+        return self.output
+
+    def flat_color(self, light_vector):
+        # Average colour of the smallest mip, darkened by the shaded fraction
+        rgb = pygame.surfarray.pixels3d(self.mip(len(self.mips) - 1))
+        color = rgb.reshape(-1, 3).mean(axis=0)
+        del rgb
+        if self.flat_mask is not None:
+            inside = np.isfinite(self.flat_mask.threshold)
+            alpha = np.zeros(inside.shape, dtype=np.uint8)
+            self.flat_mask.shade(light_vector, alpha)
+            shaded = (alpha[inside] > 0).mean()
+            color *= 1.0 - shaded * SHADOW_ALPHA / 255
+        return tuple(int(c) for c in color)
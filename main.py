@@ -1,8 +1,21 @@
 import pygame
+import argparse
 import math
 import random
-from planet import Planet
+from planet_builder import build_planets
+from scene import Scene
+from galaxy import Galaxy
+from display import Display
+from render_pool import RenderPool
+from scheduler import UpdateScheduler
+from impostor import ImpostorCache
+from system_map import MapView
 from spaceship import Spaceship
+from fleet import Fleet
+from profiler import FrameProfiler
+from starfield import Starfield
+from texture_cache import TextureCache
+from geometry import registry
 from planet_config import (
     PlanetConfig, 
     get_terran_config, 
@@ -11,7 +24,8 @@ from planet_config import (
     get_toxic_config, 
     get_lava_config,
     get_gas_giant_config,
-    get_sun_config
+    get_sun_config,
+    get_asteroid_config
 )
 
 # Initialize Pygame
@@ -20,6 +34,7 @@ pygame.init()
 # Constants
 WIDTH, HEIGHT = 1920, 1080 
 FPS = 30
+MIN_SCALE, MAX_SCALE = 0.5, 8.0
 
 # Simulation Constants (Universe)
 ORBIT_SPEED = 0.0005
@@ -28,7 +43,12 @@ TRAVEL_SPEED = 0.2
 # Colors
 C_SPACE = (20, 10, 25)
 
-def main():
+def main(profile=False, profile_csv=None, seed=None, texture_cache=True, asteroids=0,
+         memory_budget=128 * 1024 * 1024, galaxy=True, dirty_rects=False,
+         render_threads=0, update_budget_ms=8.0, replay=None, record=None, minimap=False,
+         fleet=0):
+    # replay: a replay.Replay feeding scripted input (fixed seed, no frame cap)
+    # record: path to save this session's input as a replayable timeline
     # Window setup
     real_screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Pixel Planet")
@@ -37,115 +57,181 @@ def main():
     # Zoom / Scale State
     current_scale = 4.0
     
-    def get_logical_dims(scale):
-        return int(WIDTH / scale), int(HEIGHT / scale)
-
-    logical_w, logical_h = get_logical_dims(current_scale)
-    canvas = pygame.Surface((logical_w, logical_h))
+    # Canvas views for every zoom level share one preallocated surface
+    display = Display(real_screen, MIN_SCALE, track_dirty=dirty_rects)
+    canvas = display.set_scale(current_scale)
+    logical_w, logical_h = canvas.get_size()
 
     # Create Solar System
+    # The whole system (bodies and orbits) derives from one seed
+    if seed is None:
+        seed = replay.seed if replay is not None else random.randrange(2**32)
+    system_rng = random.Random(seed)
+    cache = TextureCache() if texture_cache else None
+    
     # Sun at (0,0)
     sun_config = get_sun_config()
-    sun = Planet(sun_config)
+    sun_seed = system_rng.randrange(2**32)
     
     # Orbiting Planets
+    # Bodies live in a spatially indexed scene; each one's textures are only
+    # built once it comes near the viewport and released under memory pressure
+    scene = Scene(memory_budget=memory_budget, texture_cache=cache)
     planets = []
     
     # Types of planets to spawn (Config, Distance Multiplier relative to Sun radius)
     planet_types = [
-        (get_lava_config(), 2.0),
-        (get_terran_config(), 3.5),
-        (get_gas_giant_config(), 6.0),
-        (get_ice_world_config(), 8.5)
+        ('lava', get_lava_config(), 2.0),
+        ('terran', get_terran_config(), 3.5),
+        ('gas_giant', get_gas_giant_config(), 6.0),
+        ('ice', get_ice_world_config(), 8.5)
     ]
     
     # Base distance to ensure we don't clip inside the sun
-    orbit_base = sun.radius + 150
+    orbit_base = sun_config.radius + 150
     
-    for config, dist_mult in planet_types:
+    for name, config, dist_mult in planet_types:
         d = int(orbit_base * dist_mult)
         # Kepler-ish orbital speed (slower further out)
         # Made extremely slow (0.5 -> 0.02)
         speed = 0.02 / math.sqrt(d) 
-        angle = random.uniform(0, 6.28)
+        angle = system_rng.uniform(0, 6.28)
         
-        planets.append({
-            'body': Planet(config),
-            'dist': d,
-            'speed': speed,
-            'angle': angle,
-            'x': 0, 'y': 0
-        })
+        body = scene.add(config, system_rng.randrange(2**32), d, speed, angle, name)
+        body.update_stage = f'update:{name}'
+        body.draw_stage = f'draw:{name}'
+        planets.append(body)
+
+    # Asteroid belt between the gas giant and the ice world
+    asteroid_config = get_asteroid_config()
+    for _ in range(asteroids):
+        d = orbit_base * system_rng.uniform(6.8, 7.7)
+        body = scene.add(asteroid_config, system_rng.randrange(2**32), d, 0.02 / math.sqrt(d),
+                         system_rng.uniform(0, 6.28))
+        body.update_stage = body.draw_stage = None
+
+    # AI traffic between the planets
+    traffic = None
+    if fleet > 0:
+        traffic = Fleet(fleet, [p.index for p in planets], system_rng.randrange(2**32))
+        traffic.spawn(scene.orbits.x, scene.orbits.y)
+
+    # The sun is always needed
+    sun = build_planets([(sun_config, sun_seed)], texture_cache=cache)[0]
 
     # Create Player
     # Start near the Terran planet (index 1)
     start_p = planets[1]
     # Offset slightly so player sees the planet
-    start_x = math.cos(start_p['angle']) * (start_p['dist'] + 80)
-    start_y = math.sin(start_p['angle']) * (start_p['dist'] + 80)
+    start_angle = scene.orbits.angles()[start_p.index]
+    start_dist = scene.orbits.dist[start_p.index]
+    start_x = math.cos(start_angle) * (start_dist + 80)
+    start_y = math.sin(start_angle) * (start_dist + 80)
     
     player = Spaceship(start_x, start_y, logical_w, logical_h)
 
     # Assets
-    # Stars (Infinite field simulation)
-    stars = []
-    
-    def refresh_stars(w, h, cam_x, cam_y):
-        # When zooming, we want to somewhat preserve the starfield feel or just regen
-        # For simplicity, regen full field based on density
-        stars.clear()
-        num_stars = int(w * h * 0.0008) 
-        for _ in range(num_stars):
-            # Generate relative to camera so we are in a populated area
-            x = random.uniform(cam_x, cam_x + w)
-            y = random.uniform(cam_y, cam_y + h)
-            depth = 0.05 
-            c = random.randint(100, 200)
-            stars.append({'x': x, 'y': y, 'depth': depth, 'c': c})
-
-    # Initial stars: assume camera at 0? No, player pos
-    # Camera calc
-    cam_x = player.pos.x - logical_w / 2
-    cam_y = player.pos.y - logical_h / 2
-    refresh_stars(logical_w, logical_h, cam_x, cam_y)
+    # Stars (Infinite field, derived from the system seed)
+    starfield = Starfield(seed=seed)
+
+    # Other star systems, streamed in around the ship (the home chunk is ours)
+    galaxy_systems = Galaxy(seed, texture_cache=cache) if galaxy else None
     
     light_orbit_angle = 0.0
+    last_camera = None
+
+    # Optional worker threads that update/rasterize planets in parallel
+    render_pool = RenderPool(render_threads) if render_threads > 0 else None
+
+    # Minimap (M) and system map (Tab), drawn from cached impostor sprites
+    impostors = ImpostorCache()
+    system_span = orbit_base * 9.5
+    minimap_view = MapView((WIDTH - 280, 20, 260, 260), system_span / 3)
+    system_view = MapView(((WIDTH - HEIGHT) // 2, 0, HEIGHT, HEIGHT), system_span, body_scale=2.5,
+                          background=(0, 0, 0, 230))
+    show_minimap = minimap
+    show_system_map = False
+
+    def draw_overlays(screen):
+        if show_system_map:
+            system_view.draw(screen, (0.0, 0.0), scene, sun, player, impostors)
+        elif show_minimap:
+            minimap_view.draw(screen, (player.pos.x, player.pos.y), scene, sun, player, impostors)
+        profiler.draw_overlay(screen)
+
+    # Body updates share a per-frame budget; offscreen ones take turns
+    scheduler = UpdateScheduler(budget_ms=update_budget_ms)
+    
+    # Frame profiler (F3 toggles the overlay)
+    profiler = FrameProfiler(
+        ['events', 'updates', 'update:sun'] + [p.update_stage for p in planets] +
+        ['player'] + (['fleet'] if traffic is not None else []) +
+        ['galaxy', 'stars', 'draw:sun'] + (['draw:galaxy'] if galaxy_systems is not None else []) +
+        ['planet_draws'] + [p.draw_stage for p in planets] +
+        (['draw:fleet'] if traffic is not None else []) + ['present'],
+        budget_ms=1000 / FPS,
+        csv_path=profile_csv
+    )
+    if profile:
+        profiler.toggle()
+
+    # Scripted input instead of the keyboard, or the keyboard saved for later
+    def body_position(name):
+        if name == 'sun':
+            return (0.0, 0.0)
+        body = next(p for p in planets if p.name == name)
+        return (float(scene.orbits.x[body.index]), float(scene.orbits.y[body.index]))
+    recorder = None
+    if record is not None:
+        from replay import Recorder
+        recorder = Recorder(record, seed)
+    frame = 0
     
     running = True
     while running:
+        profiler.begin_frame()
+        t_stage = profiler.start()
+        
         # Camera calc for this frame (needed for input/stars logic?)
         # We calculate it before drawing usually, but let's have a current val
         camera_x = player.pos.x - logical_w / 2
         camera_y = player.pos.y - logical_h / 2
 
-        for event in pygame.event.get():
+        if replay is not None:
+            events, keys = replay.input(frame, player, body_position)
+            pygame.event.pump()
+        else:
+            events, keys = pygame.event.get(), pygame.key.get_pressed()
+            if recorder is not None:
+                recorder.capture(frame, events, keys)
+
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_m:
+                show_minimap = not show_minimap
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+                show_system_map = not show_system_map
             elif event.type == pygame.MOUSEWHEEL:
                 old_scale = current_scale
                 # Mouse wheel up (positive) -> Zoom IN (increase scale)
                 # Mouse wheel down (negative) -> Zoom OUT (decrease scale)
                 current_scale += event.y * 0.2
-                current_scale = max(0.5, min(current_scale, 8.0))
+                current_scale = max(MIN_SCALE, min(current_scale, MAX_SCALE))
                 
                 if abs(current_scale - old_scale) > 0.01:
-                    logical_w, logical_h = get_logical_dims(current_scale)
-                    canvas = pygame.Surface((logical_w, logical_h))
+                    canvas = display.set_scale(current_scale)
+                    logical_w, logical_h = canvas.get_size()
                     
                     # Update Player Culling Bounds
                     player.bounds_w = logical_w
                     player.bounds_h = logical_h
                     
-                    # Refresh stars for new viewport size 
-                    # (centered around current camera to avoid empty voids immediately)
-                    # Recalc camera for new center
-                    new_cam_x = player.pos.x - logical_w / 2
-                    new_cam_y = player.pos.y - logical_h / 2
-                    refresh_stars(logical_w, logical_h, new_cam_x, new_cam_y)
-                    
                     # Update camera var for this frame immediately
-                    camera_x = new_cam_x
-                    camera_y = new_cam_y
+                    camera_x = player.pos.x - logical_w / 2
+                    camera_y = player.pos.y - logical_h / 2
 
         # Dynamic Lighting / Orbit
         light_orbit_angle += ORBIT_SPEED
@@ -154,38 +240,86 @@ def main():
         ly = -0.3 # Slight vertical tilt
         light_vector = (lx, ly, lz)
 
+        profiler.stop('events', t_stage)
+        t_stage = profiler.start()
+
+        scheduler.begin_frame()
+
         # Update Sun
-        sun.update()
+        t_body = profiler.start()
+        scheduler.tick(sun)
+        profiler.stop('update:sun', t_body)
         
-        # Update Planets
-        for p in planets:
-            p['angle'] += p['speed']
-            p['x'] = math.cos(p['angle']) * p['dist']
-            p['y'] = math.sin(p['angle']) * p['dist']
-            p['body'].update()
+        # Update Planets: the ones near the viewport every frame, other
+        # built ones in turns within the remaining budget
+        scene.advance()
+        near = scene.near(camera_x, camera_y, camera_x + logical_w, camera_y + logical_h)
+        galaxy_near, galaxy_warm = [], []
+        if galaxy_systems is not None:
+            galaxy_near, galaxy_warm = galaxy_systems.planets(camera_x, camera_y, camera_x + logical_w,
+                                                              camera_y + logical_h, scene.preload_margin,
+                                                              max(logical_w, logical_h))
+        if render_pool is not None:
+            scheduler.tick_many([p.planet for p in near] + galaxy_near, render_pool.update)
+        else:
+            for p in near:
+                t_body = profiler.start()
+                scheduler.tick(p.planet)
+                if p.update_stage:
+                    profiler.stop(p.update_stage, t_body)
+            for planet in galaxy_near:
+                scheduler.tick(planet)
+        # Built planets within a screen of the view (home system and galaxy)
+        # keep ticking in turns; the others stay dormant and fast-forward
+        # when they come back
+        near_index = {p.index for p in near}
+        warm = scene.query(camera_x, camera_y, camera_x + logical_w, camera_y + logical_h,
+                           max(logical_w, logical_h))
+        scheduler.fill([scene.bodies[i].planet for i in warm
+                        if i not in near_index and scene.bodies[i].planet is not None] + galaxy_warm)
+        scheduler.end_frame()
+        profiler.notes['update budget'] = (f'{scheduler.used_ms:.2f}/{scheduler.budget_ms:.1f} ms '
+                                           f'({scheduler.usage():.0%}), {scheduler.deferred} deferred')
+        
+        profiler.stop('updates', t_stage)
+        t_stage = profiler.start()
         
         # Update Player
-        player.handle_input()
+        player.handle_input(keys)
         player.update()
         
+        profiler.stop('player', t_stage)
+        t_stage = profiler.start()
+
+        if traffic is not None:
+            traffic.update(scene.orbits.x, scene.orbits.y)
+            profiler.stop('fleet', t_stage)
+            t_stage = profiler.start()
+
+        if galaxy_systems is not None:
+            rad = math.radians(player.angle)
+            galaxy_systems.update(player.pos, player.vel, (math.cos(rad), -math.sin(rad)))
+        
+        profiler.stop('galaxy', t_stage)
+        t_stage = profiler.start()
+        
         # Camera Update (Rigid Lock)
         camera_x = player.pos.x - logical_w / 2
         camera_y = player.pos.y - logical_h / 2
 
+        # The background only needs pushing again when the view moved (a
+        # drifting ship never quite stops, so tiny moves are ignored)
+        if (last_camera is None or abs(camera_x - last_camera[0]) > 1e-3 or
+                abs(camera_y - last_camera[1]) > 1e-3):
+            display.mark_all()
+            last_camera = (camera_x, camera_y)
+
         # Draw Background & Stars (Parallax)
         canvas.fill(C_SPACE)
-        for s in stars:
-            # Scroll stars based on depth
-            # (Original World Pos - Camera * Depth) % ScreenSize
-            # Note: With resizing screen, mod logic is tricky. 
-            # We switched to "world space stars" in refresh_stars but simple parallax needs a wrap.
-            # Let's simple wrap:
-            sx = (s['x'] - camera_x * s['depth']) % logical_w
-            sy = (s['y'] - camera_y * s['depth']) % logical_h
-            
-            ix, iy = int(sx), int(sy)
-            if 0 <= ix < logical_w and 0 <= iy < logical_h:
-                 canvas.set_at((ix, iy), (s['c'], s['c'], s['c']))
+        starfield.draw(canvas, camera_x + logical_w / 2, camera_y + logical_h / 2)
+
+        profiler.stop('stars', t_stage)
+        t_stage = profiler.start()
 
         # Draw Sun
         sun_sc_x = int(0 - camera_x)
@@ -195,45 +329,112 @@ def main():
         if (-sun_margin < sun_sc_x < logical_w + sun_margin and 
             -sun_margin < sun_sc_y < logical_h + sun_margin):
             # Sun looks fine with simple front lighting or no lighting
-            sun.draw(canvas, sun_sc_x, sun_sc_y, (0, 0, 1))
+            ops = sun.render((0, 0, 1), current_scale)
+            impostors.capture(sun, (0, 0, 1), ops)
+            sun.paint(canvas, sun_sc_x, sun_sc_y, ops)
+            display.mark((sun_sc_x - sun.radius, sun_sc_y - sun.radius, sun.radius * 2 + 1, sun.radius * 2))
+
+        profiler.stop('draw:sun', t_stage)
+        t_stage = profiler.start()
+
+        if galaxy_systems is not None:
+            if galaxy_systems.draw(canvas, camera_x, camera_y, current_scale):
+                display.mark_all()
+            profiler.stop('draw:galaxy', t_stage)
+            t_stage = profiler.start()
 
         # Draw Planets
-        for p in planets:
-            px, py = p['x'], p['y']
-            sc_x = int(px - camera_x)
-            sc_y = int(py - camera_y)
-            
-            radius = p['body'].radius
-            margin = radius + 50
+        visible = scene.query(camera_x, camera_y, camera_x + logical_w, camera_y + logical_h)
+        draw_jobs = []
+        # Positions and light directions (planet to sun) come straight from
+        # the batched orbit step
+        screen_xs, screen_ys = scene.screen_positions(visible, camera_x, camera_y)
+        for p, sc_x, sc_y in zip(scene.prepare(visible), screen_xs, screen_ys):
+            light = scene.orbits.light(p.index)
             
-            if (-margin < sc_x < logical_w + margin and 
-                -margin < sc_y < logical_h + margin):
-                
-                # Calculate light direction (from planet TO sun)
-                # Sun is at 0,0
-                dx, dy = -px, -py
-                dist = math.sqrt(dx*dx + dy*dy)
-                
-                lx, ly, lz = 0, 0, 1
-                if dist > 0:
-                    lx = dx / dist
-                    ly = dy / dist
-                    # Add a small Z component so the center isn't pitch black
-                    lz = 0.25 
-                
-                p['body'].draw(canvas, sc_x, sc_y, (lx, ly, lz))
+            display.mark((sc_x - p.radius, sc_y - p.radius, p.radius * 2 + 1, p.radius * 2))
+            if p.planet is None:
+                # Still being built: a placeholder disc until it arrives
+                pygame.draw.circle(canvas, p.config.c_ocean_shallow, (sc_x, sc_y), p.radius)
+                continue
+            if render_pool is not None:
+                draw_jobs.append((p.planet, sc_x, sc_y, light, current_scale))
+                continue
+            t_body = profiler.start()
+            # The maps reuse this render instead of drawing the body again
+            ops = p.planet.render(light, current_scale)
+            impostors.capture(p.planet, light, ops)
+            p.planet.paint(canvas, sc_x, sc_y, ops)
+            if p.draw_stage:
+                profiler.stop(p.draw_stage, t_body)
+        if draw_jobs:
+            render_pool.draw(canvas, draw_jobs, impostors.capture)
+        scene.release()
+        profiler.notes['geometry'] = f'{len(registry.radii())} radii, {registry.memory_bytes() / 2**20:.1f} MiB'
+        
+        profiler.stop('planet_draws', t_stage)
+        t_stage = profiler.start()
+
+        if traffic is not None:
+            fleet_rect = traffic.draw(canvas, camera_x, camera_y)
+            if fleet_rect is not None:
+                display.mark(fleet_rect)
+            profiler.notes['fleet'] = f'{traffic.drawn}/{traffic.count} on screen, {traffic.arrivals} arrivals'
+            profiler.stop('draw:fleet', t_stage)
+            t_stage = profiler.start()
         
         # Draw Player
         player.draw(canvas, camera_x, camera_y)
+        display.mark((int(player.pos.x - camera_x) - 3, int(player.pos.y - camera_y) - 3, 7, 7))
         
         # Scale to window
-        scaled_surf = pygame.transform.scale(canvas, (WIDTH, HEIGHT))
-        real_screen.blit(scaled_surf, (0, 0))
-
-        pygame.display.flip()
-        clock.tick(FPS)
+        if profiler.show_overlay or show_minimap or show_system_map:
+            display.mark_all()
+        if show_minimap or show_system_map:
+            profiler.notes['impostors'] = (f'{len(impostors)} sprites, {impostors.captures} captured, '
+                                           f'{impostors.refreshes} refreshed')
+        display.present(draw_overlays)
+        profiler.stop('present', t_stage)
+        profiler.end_frame()
+        frame += 1
+        if replay is not None:
+            # Replays run flat out and time every frame
+            replay.frame_done()
+        else:
+            clock.tick(FPS)
 
+    profiler.close()
+    scene.close()
+    if recorder is not None:
+        recorder.save()
+    if galaxy_systems is not None:
+        galaxy_systems.close()
+    if render_pool is not None:
+        render_pool.close()
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Pixel Planet")
+    parser.add_argument('--profile', action='store_true', help="start with the frame profiler overlay shown (F3 toggles it)")
+    parser.add_argument('--profile-csv', metavar='FILE', help="stream per-frame stage timings to a CSV file")
+    parser.add_argument('--seed', type=int, help="solar system seed (random if omitted)")
+    parser.add_argument('--no-texture-cache', action='store_true', help="always regenerate planet textures")
+    parser.add_argument('--asteroids', type=int, default=0, help="number of asteroids in the belt")
+    parser.add_argument('--memory-budget', type=int, default=128, metavar='MIB',
+                        help="memory kept for built planets before far ones are released")
+    parser.add_argument('--no-galaxy', action='store_true', help="only the home system, no streamed star systems")
+    parser.add_argument('--render-threads', type=int, default=0, metavar='N',
+                        help="update and rasterize visible planets on N worker threads")
+    parser.add_argument('--update-budget', type=float, default=8.0, metavar='MS',
+                        help="per-frame time for planet updates; offscreen planets use what is left")
+    parser.add_argument('--dirty-rects', action='store_true', help="only push changed screen regions when the view is still")
+    parser.add_argument('--fleet', type=int, default=0, metavar='N', help="number of AI ships flying between the planets")
+    parser.add_argument('--minimap', action='store_true', help="start with the minimap shown (M toggles it, Tab the system map)")
+    parser.add_argument('--record', metavar='FILE', help="save this session's input as a timeline for replay.py")
+    args = parser.parse_args()
+    main(profile=args.profile, profile_csv=args.profile_csv, seed=args.seed,
+         texture_cache=not args.no_texture_cache, asteroids=args.asteroids,
+         memory_budget=args.memory_budget * 1024 * 1024, galaxy=not args.no_galaxy,
+         dirty_rects=args.dirty_rects, render_threads=args.render_threads,
+         update_budget_ms=args.update_budget, record=args.record, minimap=args.minimap,
+         fleet=args.fleet)
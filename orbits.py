@@ -0,0 +1,153 @@
+import math
+import numpy as np
+
+# Circular orbits of every body in the system held as flat arrays. Top-level
+# bodies (parent -1) orbit the star at the origin; moons orbit their parent,
+# which must be added before them. Each frame advance() moves all of them,
+# rebuilds world positions and the light direction of every body towards
+# the star in a handful of whole-array operations.
+#
+# Orbits don't change speed, so instead of cos/sin per body per frame the
+# offsets from the parent are rotated by a per-body step rotation computed
+# once. Every frame a slice of the bodies is also put back exactly where its
+# angle says, so rounding never accumulates. Per-frame arrays are float32:
+# at 100k bodies the working set, not the arithmetic, is what costs.
+
+LIGHT_Z = 0.25  # small Z component so the centre of a lit disc isn't black
+
+class OrbitalState:
+    RESYNC_FRAMES = 32   # every body is recomputed exactly this often
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.frame = 0
+        self.levels = []            # moon indices by depth (depth 1, 2, ...)
+        self.moons = np.zeros(0, dtype=np.intp)
+        self.max_step = 0.0
+        self.resync_cursor = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        old = getattr(self, 'buffers', None)
+        self.capacity = capacity
+        f32 = np.float32
+        self.buffers = {
+            # Orbit elements (angle at frame 0)
+            'angle0': np.zeros(capacity), 'speed': np.zeros(capacity), 'dist': np.zeros(capacity),
+            'parent': np.full(capacity, -1, dtype=np.intp),
+            'cos_step': np.ones(capacity, f32), 'sin_step': np.zeros(capacity, f32),
+            # Offset from the parent (or the star); world positions of moons
+            'ox': np.zeros(capacity, f32), 'oy': np.zeros(capacity, f32),
+            'mx': np.zeros(capacity, f32), 'my': np.zeros(capacity, f32),
+            # Light direction towards the star, and -1 / distance to it
+            # (fixed for top-level bodies, 0 at the star itself)
+            'lx': np.zeros(capacity, f32), 'ly': np.zeros(capacity, f32),
+            'scale': np.zeros(capacity, f32),
+            # Bound on how far a body moves in one frame
+            'step': np.zeros(capacity, f32),
+            'tmp_a': np.zeros(capacity, f32), 'tmp_b': np.zeros(capacity, f32),
+        }
+        if old is not None:
+            for name, array in old.items():
+                self.buffers[name][:self.count] = array[:self.count]
+        self.views()
+
+    def views(self):
+        # Public arrays are views of the first count entries. Without moons
+        # the offsets already are the world positions.
+        for name, array in self.buffers.items():
+            setattr(self, name, array[:self.count])
+        if len(self.moons):
+            self.x, self.y = self.mx, self.my
+        else:
+            self.x, self.y = self.ox, self.oy
+
+    def add(self, dist, speed, angle, parent=-1):
+        if self.count == self.capacity:
+            self.allocate(self.capacity * 2)
+        i = self.count
+        b = self.buffers
+        b['angle0'][i] = angle - speed * self.frame
+        b['speed'][i] = speed
+        b['dist'][i] = dist
+        b['parent'][i] = parent
+        b['cos_step'][i] = math.cos(speed)
+        b['sin_step'][i] = math.sin(speed)
+        b['ox'][i] = math.cos(angle) * dist
+        b['oy'][i] = math.sin(angle) * dist
+        b['scale'][i] = -1.0 / dist if dist > 0 else 0.0
+        b['step'][i] = abs(speed) * dist + (b['step'][parent] if parent >= 0 else 0.0)
+        self.max_step = max(self.max_step, float(b['step'][i]))
+        self.count += 1
+
+        if parent >= 0:
+            if not len(self.moons):
+                # First moon: world positions get their own arrays
+                b['mx'][:i] = b['ox'][:i]
+                b['my'][:i] = b['oy'][:i]
+            depth = 1
+            while b['parent'][parent] >= 0:
+                parent = b['parent'][parent]
+                depth += 1
+            while len(self.levels) < depth:
+                self.levels.append(np.zeros(0, dtype=np.intp))
+            self.levels[depth - 1] = np.append(self.levels[depth - 1], i)
+            self.moons = np.append(self.moons, i)
+            self.views()
+            self.resolve()
+        else:
+            self.views()
+            if len(self.moons):
+                self.x[i] = self.ox[i]
+                self.y[i] = self.oy[i]
+            self.lx[i] = self.x[i] * self.scale[i]
+            self.ly[i] = self.y[i] * self.scale[i]
+        return i
+
+    def angles(self):
+        # Current orbit angles (float64, in [0, 2pi))
+        return (self.angle0 + self.speed * self.frame) % (2 * math.pi)
+
+    def advance(self):
+        self.frame += 1
+        ox, oy = self.ox, self.oy
+        # (ox, oy) rotated by each body's step angle
+        np.multiply(ox, self.sin_step, out=self.tmp_a)
+        np.multiply(oy, self.sin_step, out=self.tmp_b)
+        ox *= self.cos_step
+        ox -= self.tmp_b
+        oy *= self.cos_step
+        oy += self.tmp_a
+
+        # Exact positions for the next slice of bodies
+        n = self.count
+        if n:
+            size = -(-n // self.RESYNC_FRAMES)
+            lo = self.resync_cursor
+            hi = min(n, lo + size)
+            angle = self.angle0[lo:hi] + self.speed[lo:hi] * self.frame
+            ox[lo:hi] = np.cos(angle) * self.dist[lo:hi]
+            oy[lo:hi] = np.sin(angle) * self.dist[lo:hi]
+            self.resync_cursor = hi % n
+        self.resolve()
+
+    def resolve(self):
+        # World positions, then light directions towards the star
+        if len(self.moons):
+            self.x[...] = self.ox
+            self.y[...] = self.oy
+            for moons in self.levels:
+                parents = self.parent[moons]
+                self.x[moons] += self.x[parents]
+                self.y[moons] += self.y[parents]
+            # A moon's distance to the star changes as it goes round
+            d = np.hypot(self.x[self.moons], self.y[self.moons])
+            self.scale[self.moons] = np.divide(-1.0, d, out=np.zeros_like(d), where=d > 0)
+        np.multiply(self.x, self.scale, out=self.lx)
+        np.multiply(self.y, self.scale, out=self.ly)
+
+    def light(self, i):
+        # Light vector of one body, as Planet.draw takes it
+        if self.scale[i] == 0:
+            return (0, 0, 1)
+        return (float(self.lx[i]), float(self.ly[i]), LIGHT_Z)
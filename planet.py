@@ -1,299 +1,525 @@
 import pygame
 import math
 import random
+import numpy as np
 from planet_config import PlanetConfig
+from projection import ShadowCache
+from geometry import registry
+from lod import PlanetLod, surface_bytes
+from terrain_noise import generate_noise_map
+
+# Bump whenever generate_base_map's output changes for the same inputs, so
+# textures cached on disk under the old version are no longer used.
+GENERATOR_VERSION = 1
+
+# The PlanetConfig fields generate_base_map can read (besides the size); the
+# texture cache key is built from these alone, so changing e.g. the radius
+# or the cloud count still reuses a cached map.
+BASE_MAP_FIELDS = ('terrain_generator', 'c_ocean_deep', 'c_ocean_shallow', 'c_land_main',
+                   'c_land_highlight', 'num_islands', 'island_size_min', 'island_size_max',
+                   'walker_x_var', 'walker_y_var', 'noise_octaves', 'noise_land')
+
+def texture_size(config):
+    # Equirectangular texture size (w, h)
+    return config.texture_width, config.texture_height
+
+def generate_base_map(config, seed, w, h):
+    # Deterministic: same seed + config + size always gives the same map
+    if config.terrain_generator == 'noise':
+        return generate_noise_map(config, seed, w, h)
+    rng = random.Random(seed)
+
+    # Helper to add slight noise to colors
+    def vary_color(color, amount=10):
+        r, g, b = color
+        r = max(0, min(255, r + rng.randint(-amount, amount)))
+        g = max(0, min(255, g + rng.randint(-amount, amount)))
+        b = max(0, min(255, b + rng.randint(-amount, amount)))
+        return (r, g, b)
+
+    surf = pygame.Surface((w, h))
+    surf.fill(config.c_ocean_deep)
+    
+    num_islands = config.num_islands
+    centers = []
+    for _ in range(num_islands):
+        cx = rng.randint(0, w)
+        cy = rng.randint(int(h*0.2), int(h*0.8))
+        centers.append((cx, cy))
+        
+    # 1. Base Land
+    for cx, cy in centers:
+        island_size = rng.randint(config.island_size_min, config.island_size_max)
+        curr_x, curr_y = cx, cy
+        for _ in range(island_size):
+            chunk_w = rng.randint(2, 6)
+            chunk_h = rng.randint(2, 6)
+            
+            col = vary_color(config.c_ocean_shallow)
+            
+            pygame.draw.rect(surf, col, (curr_x - 2, curr_y - 2, chunk_w + 4, chunk_h + 4))
+            if curr_x < 0: pygame.draw.rect(surf, col, (curr_x + w - 2, curr_y - 2, chunk_w + 4, chunk_h + 4))
+            if curr_x > w: pygame.draw.rect(surf, col, (curr_x - w - 2, curr_y - 2, chunk_w + 4, chunk_h + 4))
+            curr_x += rng.randint(-config.walker_x_var, config.walker_x_var)
+            curr_y += rng.randint(-config.walker_y_var, config.walker_y_var)
+            
+    # 2. Main Land
+    for cx, cy in centers: 
+        # Main land walk of each island is seeded from its center
+        rng = random.Random(cx * cy)
+        island_size = rng.randint(config.island_size_min, config.island_size_max)
+        curr_x, curr_y = cx, cy
+        for _ in range(island_size):
+            chunk_w = rng.randint(1, 4)
+            chunk_h = rng.randint(1, 4)
+            
+            base_col = config.c_land_main
+            if rng.random() > 0.7: base_col = config.c_land_highlight
+            
+            col = vary_color(base_col)
+            
+            pygame.draw.rect(surf, col, (curr_x, curr_y, chunk_w, chunk_h))
+            pygame.draw.rect(surf, col, (curr_x - w, curr_y, chunk_w, chunk_h))
+            pygame.draw.rect(surf, col, (curr_x + w, curr_y, chunk_w, chunk_h))
+            curr_x += rng.randint(-config.walker_x_var, config.walker_x_var)
+            curr_y += rng.randint(-config.walker_y_var, config.walker_y_var)
+    return surf
 
 class CloudManager:
-    def __init__(self, w, h, speed_base, color, num_clouds=15):
+    # Structure-of-arrays cloud state: one row per cloud, and a padded puff
+    # table of MAX_PUFFS columns where only the first puff_count are live.
+    MIN_PUFFS = 4
+    MAX_PUFFS = 15
+
+    # Size of the tiles reported in dirty_rects
+    DIRTY_TILE = 32
+
+    # Catch-ups longer than this many ticks use the bulk (closed-form) step
+    FAST_FORWARD_TICKS = 16
+    # Points in time sampled to estimate how long each cloud spent on the back side
+    FAST_FORWARD_SAMPLES = 32
+
+    # Puff sizes, offsets and speeds below are in texels of a map this size;
+    # other sizes scale them so clouds cover the same share of the planet
+    REFERENCE_SIZE = (256, 128)
+
+    def __init__(self, w, h, speed_base, color, num_clouds=15, rng=None):
         self.w, self.h = w, h
+        self.scale_x = w / self.REFERENCE_SIZE[0]
+        self.scale_y = h / self.REFERENCE_SIZE[1]
         self.speed_base = speed_base
         self.color = color
-        self.clouds = []
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.puff_ox = np.zeros((0, self.MAX_PUFFS))
+        self.puff_oy = np.zeros((0, self.MAX_PUFFS))
+        self.puff_w = np.zeros((0, self.MAX_PUFFS), dtype=np.int64)
+        self.puff_h = np.zeros((0, self.MAX_PUFFS), dtype=np.int64)
+        self.puff_count = np.zeros(0, dtype=np.int64)
         for _ in range(num_clouds):
             self.create_cloud()
 
+        # Persistent output buffer: colour is constant, only alpha changes
+        self.surface = pygame.Surface((w, h), pygame.SRCALPHA)
+        self.surface.fill((*color[:3], 0))
+
+        # Coverage of the last rasterized frame, and the tiles it changed in
+        self.coverage = np.zeros(w * h, dtype=np.uint8)
+        self.back_coverage = np.zeros(w * h, dtype=np.uint8)
+        self.dirty_rects = []
+
+    @property
+    def num_clouds(self):
+        return len(self.x)
+
     def create_cloud(self):
-        x = random.randint(0, self.w)
-        y = random.randint(int(self.h * 0.1), int(self.h * 0.9))
-        
+        rng = self.rng
+        x = rng.integers(0, self.w + 1)
+        y = rng.integers(int(self.h * 0.1), int(self.h * 0.9) + 1)
+
         # Cloud composition
-        puffs = []
-        num_puffs = random.randint(5, 10)
-        for _ in range(num_puffs):
-            w = random.randint(4, 9)
-            h = random.randint(2, 5)
-            ox = random.randint(-8, 8)
-            oy = random.randint(-4, 4)
-            puffs.append({'ox': ox, 'oy': oy, 'w': w, 'h': h})
-            
-        self.clouds.append({
-            'x': float(x),
-            'y': float(y),
-            'speed': self.speed_base + random.uniform(-0.05, 0.05),
-            'puffs': puffs
-        })
+        num_puffs = rng.integers(5, 11)
+        ox = np.zeros(self.MAX_PUFFS)
+        oy = np.zeros(self.MAX_PUFFS)
+        pw = np.zeros(self.MAX_PUFFS, dtype=np.int64)
+        ph = np.zeros(self.MAX_PUFFS, dtype=np.int64)
+        pw[:num_puffs] = self.texels(rng.integers(4, 10, num_puffs), self.scale_x)
+        ph[:num_puffs] = self.texels(rng.integers(2, 6, num_puffs), self.scale_y)
+        ox[:num_puffs] = rng.integers(-8, 9, num_puffs) * self.scale_x
+        oy[:num_puffs] = rng.integers(-4, 5, num_puffs) * self.scale_y
 
-    def update(self, rot_norm):
+        self.x = np.append(self.x, float(x))
+        self.y = np.append(self.y, float(y))
+        self.speed = np.append(self.speed, (self.speed_base + rng.uniform(-0.05, 0.05)) * self.scale_x)
+        self.puff_ox = np.vstack([self.puff_ox, ox])
+        self.puff_oy = np.vstack([self.puff_oy, oy])
+        self.puff_w = np.vstack([self.puff_w, pw])
+        self.puff_h = np.vstack([self.puff_h, ph])
+        self.puff_count = np.append(self.puff_count, num_puffs)
+
+    @staticmethod
+    def texels(size, scale):
+        # Reference puff sizes at this map's scale (at least one texel)
+        return np.maximum(1, np.rint(size * scale)).astype(np.int64)
+
+    def fresh_puffs(self, rows, cols):
+        # New puffs at these (row, column) slots
+        rng = self.rng
+        n = len(rows)
+        self.puff_ox[rows, cols] = rng.integers(-8, 9, n) * self.scale_x
+        self.puff_oy[rows, cols] = rng.integers(-4, 5, n) * self.scale_y
+        self.puff_w[rows, cols] = self.texels(rng.integers(3, 8, n), self.scale_x)
+        self.puff_h[rows, cols] = self.texels(rng.integers(2, 5, n), self.scale_y)
+
+    def safe_zone(self, rot_norm, x=None):
         # rot_norm (0..1) is the current rotation offset of the texture mapping.
-        # Define the "Safe Zone" where clouds are visible or near-visible.
-        safe_u_start = (rot_norm - 0.2) % 1.0
-        safe_u_end = (rot_norm + 0.7) % 1.0 
-        
-        safe_x_start = safe_u_start * self.w
-        safe_x_end = safe_u_end * self.w
-        
-        is_split_safety = safe_x_end < safe_x_start
+        # The "Safe Zone" is where clouds are visible or near-visible.
+        # rot_norm may also be an array broadcasting against x.
+        x = self.x if x is None else x
+        safe_x_start = ((rot_norm - 0.2) % 1.0) * self.w
+        safe_x_end = ((rot_norm + 0.7) % 1.0) * self.w
 
-        surf = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
-        
-        for c in self.clouds:
-            # Move cloud
-            c['x'] += c['speed']
-            if c['x'] >= self.w:
-                 c['x'] -= self.w
-            
-            # Check visibility / safety
-            cx = c['x']
-            in_safe_zone = False
-            
-            if not is_split_safety:
-                if safe_x_start <= cx <= safe_x_end:
-                    in_safe_zone = True
-            else:
-                # Wrap case
-                if cx >= safe_x_start or cx <= safe_x_end:
-                    in_safe_zone = True
-            
-            # If NOT in safe zone (deep in the back), mutate shape slightly
-            if not in_safe_zone:
-                # Mutation (Evolution)
-                if random.random() < 0.1:
-                    if c['puffs']:
-                        p = random.choice(c['puffs'])
-                        # Jitter
-                        p['ox'] += random.uniform(-0.5, 0.5)
-                        p['oy'] += random.uniform(-0.5, 0.5)
-                        
-                        # Clamp
-                        p['ox'] = max(-12, min(12, p['ox']))
-                        p['oy'] = max(-6, min(6, p['oy']))
-
-                    # Add/Remove puffs
-                    if random.random() < 0.02 and len(c['puffs']) < 15:
-                        c['puffs'].append({
-                            'ox': random.randint(-8, 8), 
-                            'oy': random.randint(-4, 4), 
-                            'w': random.randint(3, 7), 
-                            'h': random.randint(2, 4)
-                        })
-                    if random.random() < 0.02 and len(c['puffs']) > 4:
-                        c['puffs'].pop()
-
-            # Draw using floats
-            positions = [cx, cx - self.w, cx + self.w]
-            for dx in positions:
-                # Cull drawing for performance/sanity
-                if -30 < dx < self.w + 30:
-                     for p in c['puffs']:
-                         pygame.draw.rect(surf, self.color, (dx + p['ox'], c['y'] + p['oy'], p['w'], p['h']))
-
-        return surf
+        inside = (x >= safe_x_start) & (x <= safe_x_end)
+        # Wrap case
+        wrapped = (x >= safe_x_start) | (x <= safe_x_end)
+        return np.where(safe_x_end >= safe_x_start, inside, wrapped)
+
+    def advect(self, steps=1):
+        self.x += self.speed * steps
+        self.x %= self.w
+
+    def mutate(self, candidates):
+        # Mutation (Evolution): a few of the clouds on the back side jitter
+        # one puff and occasionally gain or lose a puff.
+        rng = self.rng
+        n = self.num_clouds
+        rows = np.nonzero(candidates & (rng.random(n) < 0.1))[0]
+        if len(rows) == 0:
+            return
+
+        count = self.puff_count[rows]
+        has_puffs = count > 0
+        jitter_rows = rows[has_puffs]
+        cols = (rng.random(len(jitter_rows)) * count[has_puffs]).astype(np.int64)
+        ox = self.puff_ox[jitter_rows, cols] + rng.uniform(-0.5, 0.5, len(jitter_rows)) * self.scale_x
+        oy = self.puff_oy[jitter_rows, cols] + rng.uniform(-0.5, 0.5, len(jitter_rows)) * self.scale_y
+        self.puff_ox[jitter_rows, cols] = np.clip(ox, -12 * self.scale_x, 12 * self.scale_x)
+        self.puff_oy[jitter_rows, cols] = np.clip(oy, -6 * self.scale_y, 6 * self.scale_y)
+
+        # Add/Remove puffs
+        add = rows[(rng.random(len(rows)) < 0.02) & (count < self.MAX_PUFFS)]
+        if len(add):
+            self.fresh_puffs(add, self.puff_count[add])
+            self.puff_count[add] += 1
+
+        remove = rows[rng.random(len(rows)) < 0.02]
+        remove = remove[self.puff_count[remove] > self.MIN_PUFFS]
+        self.puff_count[remove] -= 1
+
+    def bulk_mutate(self, back_ticks):
+        # Statistically equivalent to calling mutate() once per tick a cloud
+        # spent on the back side: event counts are drawn from binomials and
+        # the sum of many small uniform nudges from a normal of equal variance.
+        rng = self.rng
+        events = rng.binomial(back_ticks, 0.1)
+        rows = np.nonzero(events)[0]
+        if len(rows) == 0:
+            return
+        events = events[rows]
+        count = self.puff_count[rows]
+
+        cols = np.arange(self.MAX_PUFFS)[None, :]
+        live = cols < count[:, None]
+        nudges = rng.binomial(events[:, None], np.where(live, 1.0 / np.maximum(count, 1)[:, None], 0.0))
+        spread = np.sqrt(nudges / 12.0)
+        sx, sy = self.scale_x, self.scale_y
+        self.puff_ox[rows] = np.clip(self.puff_ox[rows] + rng.standard_normal(spread.shape) * spread * sx,
+                                     -12 * sx, 12 * sx)
+        self.puff_oy[rows] = np.clip(self.puff_oy[rows] + rng.standard_normal(spread.shape) * spread * sy,
+                                     -6 * sy, 6 * sy)
+
+        # Net puff gain/loss; new columns get fresh puffs
+        adds = rng.binomial(events, 0.02)
+        removes = rng.binomial(events, 0.02)
+        new_count = np.clip(count + adds - removes, np.minimum(count, self.MIN_PUFFS), self.MAX_PUFFS)
+        fresh = (cols >= count[:, None]) & (cols < new_count[:, None])
+        n = int(fresh.sum())
+        if n:
+            r, c = np.nonzero(fresh)
+            self.fresh_puffs(rows[r], c)
+        self.puff_count[rows] = new_count
+
+    def fast_forward(self, ticks, rot_norm, rot_step):
+        # Closed-form catch-up over many ticks. rot_norm is the rotation at
+        # the first tick, rot_step the rotation per tick (both in turns).
+        samples = min(ticks, self.FAST_FORWARD_SAMPLES)
+        t = (np.arange(samples) + 0.5) * (ticks / samples)
+        x = (self.x[None, :] + self.speed[None, :] * t[:, None]) % self.w
+        back = ~self.safe_zone((rot_norm + rot_step * t[:, None]) % 1.0, x)
+        back_ticks = np.rint(back.mean(axis=0) * ticks).astype(np.int64)
+        self.advect(ticks)
+        self.bulk_mutate(back_ticks)
+
+    def rasterize(self):
+        # Every puff rect (plus its wrapped copies) is expanded against a small
+        # stencil of pixel offsets and scattered into the alpha channel at once.
+        w, h = self.w, self.h
+        live = np.arange(self.MAX_PUFFS)[None, :] < self.puff_count[:, None]
+        px = (self.x[:, None] + self.puff_ox)[live]
+        py = (self.y[:, None] + self.puff_oy)[live]
+        pw = self.puff_w[live]
+        ph = self.puff_h[live]
+
+        px = np.concatenate([px, px - w, px + w])
+        py = np.concatenate([py, py, py])
+        pw = np.concatenate([pw, pw, pw])
+        ph = np.concatenate([ph, ph, ph])
+
+        # Same truncation pygame applies to float rect coordinates
+        x0 = np.trunc(px).astype(np.int64)
+        y0 = np.trunc(py).astype(np.int64)
+        on_texture = (x0 < w) & (x0 + pw > 0) & (y0 < h) & (y0 + ph > 0)
+        x0, y0, pw, ph = x0[on_texture], y0[on_texture], pw[on_texture], ph[on_texture]
+
+        coverage = self.back_coverage
+        coverage.fill(0)
+        if len(x0):
+            sx = np.arange(pw.max())[None, :, None]
+            sy = np.arange(ph.max())[None, None, :]
+            xs = x0[:, None, None] + sx
+            ys = y0[:, None, None] + sy
+            covered = ((sx < pw[:, None, None]) & (sy < ph[:, None, None]) &
+                       (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h))
+            coverage[(xs * h + ys)[covered]] = 255
+
+        changed = (coverage != self.coverage).reshape(w, h)
+        self.back_coverage = self.coverage
+        self.coverage = coverage
+        self.dirty_rects = self.changed_tiles(changed)
+        if self.dirty_rects:
+            alpha = pygame.surfarray.pixels_alpha(self.surface)
+            alpha[...] = coverage.reshape(w, h)
+            del alpha
+
+    def changed_tiles(self, changed):
+        tile = self.DIRTY_TILE
+        if not changed.any():
+            return []
+        tiles = np.logical_or.reduceat(changed, np.arange(0, self.w, tile), axis=0)
+        tiles = np.logical_or.reduceat(tiles, np.arange(0, self.h, tile), axis=1)
+        rects = []
+        for tx, ty in zip(*np.nonzero(tiles)):
+            x, y = int(tx) * tile, int(ty) * tile
+            rects.append(pygame.Rect(x, y, min(tile, self.w - x), min(tile, self.h - y)))
+        return rects
+
+    def nbytes(self):
+        arrays = (self.x, self.y, self.speed, self.puff_ox, self.puff_oy, self.puff_w, self.puff_h,
+                  self.puff_count, self.coverage, self.back_coverage)
+        return sum(a.nbytes for a in arrays) + surface_bytes(self.surface)
+
+    def step(self, rot_norm):
+        # One tick of weather, without touching the output
+        self.advect()
+        self.mutate(~self.safe_zone(rot_norm))
+
+    def update(self, rot_norm):
+        if self.num_clouds == 0:
+            self.dirty_rects = []
+            return self.surface
+        self.step(rot_norm)
+        self.rasterize()
+        return self.surface
 
 class Planet:
-    def __init__(self, config: PlanetConfig):
+    def __init__(self, config: PlanetConfig, seed=None, texture_cache=None, base_texture=None, shadow_mask=None):
         self.config = config
+        # Everything random about a planet derives from its seed
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
         self.radius = config.radius
         self.rotation_speed = config.rotation_speed
         self.rotation_angle = 0.0
         
         # Texture Size
-        self.tex_w = 256
-        self.tex_h = 128
+        self.tex_w, self.tex_h = texture_size(config)
         
-        # Generate Terrain
-        self.base_texture = self.generate_base_map(self.tex_w, self.tex_h)
-        self.wrapped_texture = pygame.Surface((self.tex_w * 2, self.tex_h))
+        # Generate Terrain (or map it straight from the disk cache)
+        # base_texture/shadow_mask let a caller hand in parts built elsewhere
+        self.base_texture = base_texture
+        if self.base_texture is None and texture_cache is not None:
+            cache_key = texture_cache.key(config, seed, (self.tex_w, self.tex_h), GENERATOR_VERSION)
+            self.base_texture = texture_cache.load(cache_key, (self.tex_w, self.tex_h))
+        if self.base_texture is None:
+            self.base_texture = self.generate_base_map(self.tex_w, self.tex_h)
+            if texture_cache is not None:
+                texture_cache.store(cache_key, self.base_texture)
+        # Persistent composite of terrain + clouds, patched in place by update()
+        self.texture = pygame.Surface((self.tex_w, self.tex_h))
+        self.texture.blit(self.base_texture, (0, 0))
+        self.bytes_copied = 0
+        # Bumped whenever the composite changes (LOD mips rebuild from it)
+        self.texture_version = 0
         
         # Weather
-        self.clouds = CloudManager(self.tex_w, self.tex_h, config.weather_speed, config.c_cloud, config.num_clouds)
+        self.clouds = CloudManager(self.tex_w, self.tex_h, config.weather_speed, config.c_cloud, config.num_clouds,
+                                   rng=np.random.default_rng(seed))
         
         # Pre-calc 3D Normals
-        self.pixel_normals = []
+        self.shadow_mask = None
+        self.shadow_cache = None
         # Optimization: Only calculate normals if we actually use them (dither_shadows is True)
         # This saves massive startup time for large stars (dither_shadows=False)
         if hasattr(config, 'dither_shadows') and config.dither_shadows:
-            for y in range(self.radius * 2):
-                dy = (y - self.radius) / self.radius
-                for x in range(self.radius * 2):
-                    dx = (x - self.radius) / self.radius
-                    dist_sq = dx*dx + dy*dy
-                    if dist_sq <= 1.0:
-                        dz = math.sqrt(1.0 - dist_sq)
-                        self.pixel_normals.append((x, y, dx, dy, dz))
+            # Normals are shared by every body of this radius
+            self.shadow_mask = registry.shadow_mask(self.radius, shadow_mask)
+            self.shadow_cache = ShadowCache(self.shadow_mask, config.shadow_cache_step, config.shadow_cache_size)
         
-        # We still need the surface buffer, but leave it empty if no shadows
-        self.shadow_overlay = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
+        # Current overlay, handed out by the shadow cache on first draw
+        self.shadow_overlay = None
+
+        # Spherical projection: the texture lookup is shared per radius, the
+        # disc surface is reused every frame and only its RGB is rewritten.
+        self.projection = registry.projection(self.radius, self.tex_w, self.tex_h)
+        self.disc = pygame.Surface(self.projection.mask.shape, pygame.SRCALPHA)
+        pygame.surfarray.pixels_alpha(self.disc)[...] = self.projection.mask * 255
+
+        # Rotation atlas: a body without clouds looks the same every time it
+        # reaches a given angle, so its projected disc can be baked per angle.
+        # Only used when all frames fit in the configured memory budget.
+        self.rotation_atlas = None
+        frames = config.rotation_atlas_frames
+        if frames > 0 and config.num_clouds == 0:
+            frame_bytes = self.disc.get_width() * self.disc.get_height() * self.disc.get_bytesize()
+            if frames * frame_bytes <= config.rotation_atlas_budget:
+                self.rotation_atlas = [None] * frames
+                if not config.rotation_atlas_lazy:
+                    for i in range(frames):
+                        self.atlas_frame(i / frames)
+
+        # Level of detail: reduced-radius levels, flat disc and single pixel
+        self.lod = PlanetLod(self)
+
+    def render_disc(self, rot_norm):
+        texture_rgb = pygame.surfarray.pixels3d(self.texture)
+        disc_rgb = pygame.surfarray.pixels3d(self.disc)
+        self.projection.project(texture_rgb, rot_norm, disc_rgb)
+        del texture_rgb, disc_rgb
+        return self.disc
+
+    def atlas_frame(self, rot_norm):
+        # Nearest baked angle; frames are rendered on first use
+        frames = len(self.rotation_atlas)
+        index = int(round(rot_norm * frames)) % frames
+        frame = self.rotation_atlas[index]
+        if frame is None:
+            frame = self.render_disc(index / frames).copy()
+            self.rotation_atlas[index] = frame
+        return frame
+
+    def memory_bytes(self):
+        # Rough footprint of everything this planet holds on to (shared
+        # geometry is accounted for by the registry)
+        total = sum(surface_bytes(s) for s in (self.base_texture, self.texture, self.disc))
+        total += self.clouds.nbytes() + self.lod.nbytes()
+        if self.shadow_cache is not None:
+            total += self.shadow_cache.nbytes()
+        if self.rotation_atlas is not None:
+            total += sum(surface_bytes(frame) for frame in self.rotation_atlas)
+        return total
 
     def generate_base_map(self, w, h):
-        # Helper to add slight noise to colors
-        def vary_color(color, amount=10):
-            r, g, b = color
-            r = max(0, min(255, r + random.randint(-amount, amount)))
-            g = max(0, min(255, g + random.randint(-amount, amount)))
-            b = max(0, min(255, b + random.randint(-amount, amount)))
-            return (r, g, b)
-
-        surf = pygame.Surface((w, h))
-        surf.fill(self.config.c_ocean_deep)
-        
-        num_islands = self.config.num_islands
-        centers = []
-        for _ in range(num_islands):
-            cx = random.randint(0, w)
-            cy = random.randint(int(h*0.2), int(h*0.8))
-            centers.append((cx, cy))
-            
-        # 1. Base Land
-        for cx, cy in centers:
-            island_size = random.randint(self.config.island_size_min, self.config.island_size_max)
-            curr_x, curr_y = cx, cy
-            for _ in range(island_size):
-                chunk_w = random.randint(2, 6)
-                chunk_h = random.randint(2, 6)
-                
-                col = vary_color(self.config.c_ocean_shallow)
-                
-                pygame.draw.rect(surf, col, (curr_x - 2, curr_y - 2, chunk_w + 4, chunk_h + 4))
-                if curr_x < 0: pygame.draw.rect(surf, col, (curr_x + w - 2, curr_y - 2, chunk_w + 4, chunk_h + 4))
-                if curr_x > w: pygame.draw.rect(surf, col, (curr_x - w - 2, curr_y - 2, chunk_w + 4, chunk_h + 4))
-                curr_x += random.randint(-self.config.walker_x_var, self.config.walker_x_var)
-                curr_y += random.randint(-self.config.walker_y_var, self.config.walker_y_var)
-                
-        # 2. Main Land
-        for cx, cy in centers: 
-            random.seed(cx * cy) 
-            island_size = random.randint(self.config.island_size_min, self.config.island_size_max)
-            curr_x, curr_y = cx, cy
-            for _ in range(island_size):
-                chunk_w = random.randint(1, 4)
-                chunk_h = random.randint(1, 4)
-                
-                base_col = self.config.c_land_main
-                if random.random() > 0.7: base_col = self.config.c_land_highlight
-                
-                col = vary_color(base_col)
-                
-                pygame.draw.rect(surf, col, (curr_x, curr_y, chunk_w, chunk_h))
-                pygame.draw.rect(surf, col, (curr_x - w, curr_y, chunk_w, chunk_h))
-                pygame.draw.rect(surf, col, (curr_x + w, curr_y, chunk_w, chunk_h))
-                curr_x += random.randint(-self.config.walker_x_var, self.config.walker_x_var)
-                curr_y += random.randint(-self.config.walker_y_var, self.config.walker_y_var)
-        random.seed() 
-        return surf
-
-    def update(self):
-        self.rotation_angle += self.rotation_speed
-        if self.rotation_angle >= 360: self.rotation_angle -= 360
-        
-        rot_norm = self.rotation_angle / 360.0
+        return generate_base_map(self.config, self.seed, w, h)
+
+    def update(self, ticks=1):
+        # ticks > 1 catches up on frames this body wasn't updated for: short
+        # gaps run tick by tick (same result as separate calls), long ones use
+        # the closed-form fast forward. Either way the clouds are only
+        # rasterized and composited once.
+        if self.clouds.num_clouds == 0:
+            self.rotation_angle = (self.rotation_angle + self.rotation_speed * ticks) % 360
+            self.bytes_copied = 0
+            return
+
+        if ticks > self.clouds.FAST_FORWARD_TICKS:
+            # Dormant body waking up: jump straight to the present
+            first = (self.rotation_angle + self.rotation_speed) / 360.0
+            self.clouds.fast_forward(ticks, first, self.rotation_speed / 360.0)
+            self.rotation_angle = (self.rotation_angle + self.rotation_speed * ticks) % 360
+        else:
+            for _ in range(ticks):
+                self.rotation_angle += self.rotation_speed
+                if self.rotation_angle >= 360: self.rotation_angle -= 360
+                self.clouds.step(self.rotation_angle / 360.0)
         
-        cloud_surf = self.clouds.update(rot_norm)
+        # Debug: bytes of texture copied this frame (stays 0 for static bodies)
+        self.bytes_copied = 0
         
-        planet_texture = self.base_texture.copy()
-        planet_texture.blit(cloud_surf, (0, 0))
+        self.clouds.rasterize()
+        cloud_surf = self.clouds.surface
         
-        self.wrapped_texture.blit(planet_texture, (0, 0))
-        self.wrapped_texture.blit(planet_texture, (self.tex_w, 0))
+        # Only re-composite the tiles where cloud coverage changed
+        bytes_per_pixel = self.texture.get_bytesize()
+        for rect in self.clouds.dirty_rects:
+            self.texture.blit(self.base_texture, rect, rect)
+            self.texture.blit(cloud_surf, rect, rect)
+            self.bytes_copied += 2 * rect.w * rect.h * bytes_per_pixel
+        if self.clouds.dirty_rects:
+            self.texture_version += 1
+
+    def draw(self, surface, center_x, center_y, light_vector, scale=1.0):
+        # scale is the zoom of the target surface (window px per surface px);
+        # it picks the level of detail from the body's on-screen size
+        self.paint(surface, center_x, center_y, self.render(light_vector, scale))
+
+    def render(self, light_vector, scale=1.0):
+        # Rasterize into this planet's own buffers and return the blits that
+        # put it on screen. Touches nothing shared, so different planets can
+        # render on different threads; the ops stay valid until the next render.
+        level = self.lod.select(scale)
+        rot_norm = self.rotation_angle / 360.0
+        if level == self.lod.pixel:
+            size = max(1, int(math.ceil(1 / scale)))
+            return [('fill', self.lod.flat_color(light_vector), size)]
+        if level == self.lod.flat:
+            return [('circle', self.lod.flat_color(light_vector), self.radius)]
+        if level > 0:
+            # Reduced levels carry their own shadow
+            return [('blit', self.lod.render(level, rot_norm, light_vector))]
+        return self.render_full(light_vector)
+
+    def render_full(self, light_vector):
+        # Full-resolution render, whatever the current level of detail
+        rot_norm = self.rotation_angle / 360.0
 
-    def draw(self, surface, center_x, center_y, light_vector):
-        lx, ly, lz = light_vector
-        
         # Update Shadow
-        self.shadow_overlay.fill((0,0,0,0))
-        
         # If we have dither_shadows enabled, we do the full lighting calculation.
-        # If disabled (like for a Sun), we might skip shadows entirely or just do simple ones.
-        # For the Sun, we probably want NO shadow overlay at all because it's emissive.
+        # For the Sun/Emissive bodies we want NO shadow overlay at all.
         if self.config.dither_shadows:
-            for x, y, nx, ny, nz in self.pixel_normals:
-                 dot = nx * lx + ny * ly + nz * lz
-                 if dot < 0.0:
-                     self.shadow_overlay.set_at((x, y), (0, 0, 0, 180))
-                 elif dot < 0.15:
-                     if (x + y) % 2 == 0:
-                         self.shadow_overlay.set_at((x, y), (0, 0, 0, 180))
-                 elif dot < 0.3:
-                     if (x % 2 == 0) and (y % 2 == 0):
-                          self.shadow_overlay.set_at((x, y), (0, 0, 0, 180))
-        else:
-             # For Sun/Emissive: No shadow overlay
-             pass
+            self.shadow_overlay = self.shadow_cache.get(light_vector)
 
         # Spherical Projection
-        slice_height = 1
-        rot_norm = self.rotation_angle / 360.0
-        
-        # Clipping: Only iterate rows that are visible on the target surface
-        # We want: 0 <= center_y + y_rel < surface_height
-        surface_h = surface.get_height()
-        min_y_rel = -self.radius
-        max_y_rel = self.radius
-        
-        start_y = max(min_y_rel, -center_y)
-        end_y = min(max_y_rel, surface_h - center_y)
-        
-        # Ensure we don't crash if offscreen (though main.py should cull too)
-        if start_y < end_y:
-            for y_rel in range(start_y, end_y, slice_height):
-                y_center = y_rel
-                if abs(y_center) >= self.radius: continue
-
-                # Circle width at this Y
-                half_width = math.sqrt(self.radius**2 - y_center**2)
-                width_here = int(half_width * 2)
-                if width_here <= 0: continue
-
-                # Lat coordinate
-                lat = math.asin(y_center / self.radius)
-                norm_v = 1.0 - (lat + (math.pi/2)) / math.pi
-                tex_y = int(norm_v * self.tex_h)
-                tex_y = max(0, min(self.tex_h-1, tex_y))
-
-                # Draw row
-                dest_y = center_y + y_rel
-                start_x = center_x - int(half_width)
-                
-                num_segments = max(16, width_here // 2)
-                
-                total_visible_tex_u = 0.5
-                segment_tex_w = (total_visible_tex_u / num_segments) * self.tex_w
-                
-                for i in range(num_segments):
-                    # Screen space segments
-                    t1 = - (math.pi / 2) + (i * (math.pi/num_segments))
-                    t2 = - (math.pi / 2) + ((i + 1) * (math.pi/num_segments))
-                    
-                    x1 = half_width * math.sin(t1)
-                    x2 = half_width * math.sin(t2)
-                    
-                    seg_x = int(start_x + half_width + x1)
-                    seg_w = int(start_x + half_width + x2) - seg_x
-                    
-                    if seg_w < 1: seg_w = 1
-                    
-                    # Texture UVs
-                    u1 = (t1 + math.pi/2) / (2*math.pi) + rot_norm
-                    
-                    src_x = int((u1 % 1.0) * self.tex_w)
-                    src_w_pixels = int(segment_tex_w) + 1 
-                    
-                    try:
-                        chunk = self.wrapped_texture.subsurface((src_x, tex_y, src_w_pixels, 1))
-                        chunk = pygame.transform.scale(chunk, (seg_w, 1))
-                        surface.blit(chunk, (seg_x, dest_y))
-                    except (ValueError, pygame.error):
-                        pass
+        if self.rotation_atlas is not None:
+            disc = self.atlas_frame(rot_norm)
+        else:
+            disc = self.render_disc(rot_norm)
+        ops = [('blit', disc)]
 
         # Apply Shadow
         if self.config.dither_shadows:
-            surface.blit(self.shadow_overlay, (center_x - self.radius, center_y - self.radius))
+            ops.append(('blit', self.shadow_overlay))
+        return ops
+
+    def paint(self, surface, center_x, center_y, ops):
+        for kind, value, *extra in ops:
+            if kind == 'blit':
+                surface.blit(value, (center_x - self.radius, center_y - self.radius))
+            elif kind == 'fill':
+                size = extra[0]
+                surface.fill(value, (center_x - size // 2, center_y - size // 2, size, size))
+            else:
+                pygame.draw.circle(surface, value, (center_x, center_y), extra[0])
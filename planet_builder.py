@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pygame
+from planet import Planet, GENERATOR_VERSION, generate_base_map, texture_size
+
+# Builds batches of planets across a process pool. Workers only produce
+# raw data (RGB bytes of the base map); surfaces are made in the parent,
+# since pygame surfaces can't cross process boundaries. Radius-dependent
+# geometry comes from the parent's shared registry.
+
+def build_parts(spec):
+    config, seed = spec
+    w, h = texture_size(config)
+    return pygame.image.tobytes(generate_base_map(config, seed, w, h), 'RGB')
+
+def build_planets(specs, workers=None, texture_cache=None, min_batch=4):
+    # specs: list of (PlanetConfig, seed). Returns planets in the same order.
+    # Every planet draws only from its own seeded RNGs, so the result does
+    # not depend on which worker built it.
+    specs = list(specs)
+    sizes = [texture_size(config) for config, _ in specs]
+    textures = [None] * len(specs)
+
+    keys = [None] * len(specs)
+    if texture_cache is not None:
+        for i, (config, seed) in enumerate(specs):
+            keys[i] = texture_cache.key(config, seed, sizes[i], GENERATOR_VERSION)
+            textures[i] = texture_cache.load(keys[i], sizes[i])
+
+    pending = [i for i, tex in enumerate(textures) if tex is None]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(pending))
+    if workers > 1 and len(pending) >= min_batch:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(pending) // (workers * 4))
+            results = pool.map(build_parts, [specs[i] for i in pending], chunksize=chunksize)
+            for i, pixels in zip(pending, results):
+                textures[i] = pygame.image.frombuffer(pixels, sizes[i], 'RGB')
+    else:
+        # Not worth a pool: build in this process
+        for i in pending:
+            config, seed = specs[i]
+            textures[i] = generate_base_map(config, seed, *sizes[i])
+
+    if texture_cache is not None:
+        for i in pending:
+            texture_cache.store(keys[i], textures[i])
+
+    return [Planet(config, seed, base_texture=textures[i])
+            for i, (config, seed) in enumerate(specs)]
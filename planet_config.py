@@ -13,7 +13,16 @@ class PlanetConfig:
     c_land_highlight: tuple = (140, 200, 100)
     c_cloud: tuple = (230, 240, 255)
     
+    # Equirectangular texture size
+    texture_width: int = 256
+    texture_height: int = 128
+    
     # Terrain Generation
+    # 'walker' paints islands with random walkers; 'noise' uses the
+    # vectorized fBm generator (fast at large texture sizes)
+    terrain_generator: str = 'walker'
+    noise_octaves: int = 6
+    noise_land: float = 0.35  # fraction of the surface above sea level
     num_islands: int = 12
     island_size_min: int = 20
     island_size_max: int = 100
@@ -27,6 +36,18 @@ class PlanetConfig:
     
     # Rendering
     dither_shadows: bool = True
+    
+    # Shadow cache: light directions are rounded to this step before lookup,
+    # and at most this many overlays are kept (least recently used dropped)
+    shadow_cache_step: float = 0.01
+    shadow_cache_size: int = 8
+    
+    # Rotation atlas (cloudless bodies only): pre-render this many rotation
+    # frames and blit the nearest one instead of projecting live. 0 disables
+    # it; live projection is also used if the frames exceed the budget.
+    rotation_atlas_frames: int = 0
+    rotation_atlas_budget: int = 64 * 1024 * 1024  # bytes
+    rotation_atlas_lazy: bool = True  # render frames on first use
 
 # Presets
 
@@ -114,6 +135,34 @@ def get_sun_config():
         island_size_min=4,             # Small spots
         island_size_max=18,            # Not huge continents
         num_clouds=0,                  
-        dither_shadows=False
+        dither_shadows=False,
+        rotation_atlas_frames=256      # One frame per texel column
     )
 
+def get_asteroid_config():
+    return PlanetConfig(
+        radius=6,                      # Tiny, meant to come in the thousands
+        c_ocean_deep=(70, 65, 60),
+        c_ocean_shallow=(95, 90, 80),
+        c_land_main=(120, 110, 100),
+        c_land_highlight=(150, 140, 125),
+        rotation_speed=0.02,
+        num_islands=10,
+        island_size_min=10,
+        island_size_max=40,
+        num_clouds=0,                  # Bare rock
+        rotation_atlas_frames=64
+    )
+
+
+# Registry of presets by name (used by tooling that takes presets on the command line)
+PRESETS = {
+    'terran': get_terran_config,
+    'ice': get_ice_world_config,
+    'desert': get_desert_config,
+    'toxic': get_toxic_config,
+    'lava': get_lava_config,
+    'gas_giant': get_gas_giant_config,
+    'sun': get_sun_config,
+    'asteroid': get_asteroid_config,
+}
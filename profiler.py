@@ -0,0 +1,121 @@
+import csv
+import time
+from collections import deque
+import pygame
+
+class FrameProfiler:
+    # Times named stages of the main loop. Stages can nest (a per-body stage
+    # inside "updates") since each one is timed with its own start/stop pair.
+    # When disabled, start() and stop() return immediately.
+    def __init__(self, stages, budget_ms=1000 / 30, window=60, history=240, csv_path=None):
+        self.stages = list(stages)
+        self.budget_ms = budget_ms
+        self.enabled = False
+        self.show_overlay = False
+
+        self.samples = {name: deque(maxlen=window) for name in self.stages}
+        self.frame_times = deque(maxlen=history)
+        self.current = {}
+        self.frame_start = 0.0
+        self.frame_index = 0
+        # Free-form lines shown under the frame time (name -> text)
+        self.notes = {}
+
+        self.font = None
+        self.csv_file = None
+        self.csv_writer = None
+        if csv_path:
+            self.csv_file = open(csv_path, 'w', newline='')
+            self.csv_writer = csv.writer(self.csv_file)
+            self.csv_writer.writerow(['frame', 'total_ms'] + self.stages)
+            # Streaming to CSV needs timings even while the overlay is hidden
+            self.enabled = True
+
+    def toggle(self):
+        self.show_overlay = not self.show_overlay
+        was_enabled = self.enabled
+        self.enabled = self.show_overlay or self.csv_writer is not None
+        if self.enabled and not was_enabled:
+            # Toggled on mid-frame: start timing from here
+            self.current.clear()
+            self.frame_start = time.perf_counter()
+
+    def start(self):
+        if not self.enabled:
+            return 0.0
+        return time.perf_counter()
+
+    def stop(self, name, t0):
+        if not self.enabled:
+            return
+        self.current[name] = self.current.get(name, 0.0) + (time.perf_counter() - t0)
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.current.clear()
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        total_ms = (time.perf_counter() - self.frame_start) * 1000
+        self.frame_times.append(total_ms)
+
+        row = [self.frame_index, f'{total_ms:.3f}']
+        for name in self.stages:
+            ms = self.current.get(name, 0.0) * 1000
+            self.samples[name].append(ms)
+            row.append(f'{ms:.3f}')
+        if self.csv_writer:
+            self.csv_writer.writerow(row)
+        self.frame_index += 1
+
+    def averages(self):
+        return {name: sum(s) / len(s) if s else 0.0 for name, s in self.samples.items()}
+
+    def draw_overlay(self, surface):
+        if not self.show_overlay:
+            return
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+
+        line_h = 16
+        graph_h = 80
+        width = 320
+        height = 10 + line_h * (len(self.stages) + len(self.notes) + 1) + graph_h + 10
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+
+        avg_total = sum(self.frame_times) / len(self.frame_times) if self.frame_times else 0.0
+        color = (255, 90, 90) if avg_total > self.budget_ms else (200, 255, 200)
+        panel.blit(self.font.render(f'frame {avg_total:6.2f} ms / {self.budget_ms:.1f} ms', True, color), (8, 6))
+
+        y = 6 + line_h
+        for name, text in self.notes.items():
+            panel.blit(self.font.render(f'{name}: {text}', True, (220, 220, 220)), (8, y))
+            y += line_h
+        for name, ms in self.averages().items():
+            panel.blit(self.font.render(name, True, (220, 220, 220)), (8, y))
+            value = self.font.render(f'{ms:.2f} ms', True, (220, 220, 220))
+            panel.blit(value, (210 - value.get_width(), y))
+            pygame.draw.rect(panel, (90, 140, 220), (220, y + 3, min(90, int(ms / self.budget_ms * 90)), 8))
+            y += line_h
+
+        # Frame-time graph, budget line drawn at half the graph height
+        graph_top = y + 4
+        scale = (graph_h / 2) / self.budget_ms
+        pygame.draw.line(panel, (255, 200, 0), (8, graph_top + graph_h // 2), (width - 8, graph_top + graph_h // 2))
+        bar_w = max(1, (width - 16) // self.frame_times.maxlen)
+        for i, ms in enumerate(self.frame_times):
+            bar = min(graph_h, int(ms * scale))
+            col = (255, 90, 90) if ms > self.budget_ms else (120, 220, 120)
+            pygame.draw.rect(panel, col, (8 + i * bar_w, graph_top + graph_h - bar, bar_w, bar))
+
+        surface.blit(panel, (10, 10))
+
+    def close(self):
+        if self.csv_file:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv_writer = None
@@ -0,0 +1,147 @@
+import math
+from collections import OrderedDict
+import numpy as np
+import pygame
+
+class SphereProjection:
+    # Precomputed (x, y) -> texture coordinate map for a disc of a given radius.
+    # Arrays are indexed [x, y] to line up with pygame.surfarray views.
+    def __init__(self, radius, tex_w, tex_h):
+        self.radius = radius
+        self.tex_w = tex_w
+        self.tex_h = tex_h
+
+        size = radius * 2
+        y_rel = np.arange(size, dtype=np.float64) - radius
+        # One spare column: the rim can round out to x == radius on the right
+        cols = np.arange(size + 1, dtype=np.float64)
+
+        # Row extents (same integer rounding the old segment renderer used)
+        half_width = np.sqrt(np.maximum(radius * radius - y_rel * y_rel, 0.0))
+        row_left = radius - np.floor(half_width)
+        row_width = np.floor(half_width * 2)
+        valid_row = np.abs(y_rel) < radius
+
+        # The segment renderer forced its last segment to be at least one
+        # pixel wide, which poked one pixel past the rim on some rows.
+        num_segments = np.maximum(16, row_width // 2)
+        last_seg_x = np.floor(half_width + half_width * np.sin(math.pi / 2 - math.pi / num_segments))
+        row_width += last_seg_x >= row_width
+
+        j = cols[:, None] - row_left[None, :]
+        self.mask = (j >= 0) & (j < row_width[None, :]) & valid_row[None, :]
+
+        # Longitude: x = hw * sin(t), t in [-pi/2, pi/2] maps to u in [0, 0.5]
+        safe_hw = np.where(half_width > 0, half_width, 1.0)
+        sin_t = np.clip((j + 0.5 - half_width[None, :]) / safe_hw[None, :], -1.0, 1.0)
+        u = (np.arcsin(sin_t) + math.pi / 2) / (2 * math.pi)
+        self.tex_u = (u * tex_w).astype(np.float32)
+
+        # Latitude -> texture row
+        lat = np.arcsin(np.clip(y_rel / radius, -1.0, 1.0))
+        norm_v = 1.0 - (lat + math.pi / 2) / math.pi
+        self.tex_rows = np.clip((norm_v * tex_h).astype(np.intp), 0, tex_h - 1)
+        self.tex_v = np.broadcast_to(self.tex_rows[None, :], (size + 1, size))
+
+    def nbytes(self):
+        # tex_v is a broadcast view of tex_rows
+        return self.mask.nbytes + self.tex_u.nbytes + self.tex_rows.nbytes
+
+    def project(self, texture_rgb, rot_norm, out_rgb):
+        # Rotation is just an offset on u, wrapped back into the texture
+        tex_x = (self.tex_u + rot_norm * self.tex_w).astype(np.intp)
+        tex_x %= self.tex_w
+        out_rgb[...] = texture_rgb[tex_x, self.tex_v]
+
+SHADOW_ALPHA = 180
+
+class ShadowMask:
+    # Per-pixel surface normals for a disc, plus the dither pattern folded
+    # into one threshold per pixel: solid below 0.0, checkerboard below 0.15,
+    # every other pixel of every other row below 0.3.
+    def __init__(self, radius):
+        self.radius = radius
+
+        size = radius * 2
+        coords = np.arange(size)
+        d = (coords - radius) / radius
+        dx = d[:, None]
+        dy = d[None, :]
+        dist_sq = dx * dx + dy * dy
+        inside = dist_sq <= 1.0
+
+        # x and y components are separable; pixels outside the disc never
+        # shade (threshold -inf), so they need no zeroing
+        self.nx = dx
+        self.ny = dy
+        self.nz = np.sqrt(np.where(inside, 1.0 - dist_sq, 0.0))
+
+        x = coords[:, None]
+        y = coords[None, :]
+        checker = (x + y) % 2 == 0
+        quad = (x % 2 == 0) & (y % 2 == 0)
+        threshold = np.where(quad, 0.3, np.where(checker, 0.15, 0.0))
+        self.threshold = np.where(inside, threshold, -np.inf)
+
+    def nbytes(self):
+        return self.nx.nbytes + self.ny.nbytes + self.nz.nbytes + self.threshold.nbytes
+
+    def shade(self, light_vector, out_alpha):
+        lx, ly, lz = light_vector
+        dot = self.nx * lx + self.ny * ly + self.nz * lz
+        out_alpha[...] = (dot < self.threshold) * SHADOW_ALPHA
+
+class ShadowCache:
+    # LRU of ready-made shadow overlays keyed by the quantized light direction.
+    # The light changes very slowly, so most frames can reuse an overlay.
+    def __init__(self, mask, step=0.01, max_size=8):
+        self.mask = mask
+        self.step = step
+        self.max_size = max(1, max_size)
+        self.size = (mask.radius * 2, mask.radius * 2)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def quantize(self, light_vector):
+        if self.step <= 0:
+            return tuple(light_vector)
+        return tuple(round(c / self.step) for c in light_vector)
+
+    def get(self, light_vector):
+        key = self.quantize(light_vector)
+        overlay = self.entries.get(key)
+        if overlay is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return overlay
+
+        self.misses += 1
+        if len(self.entries) >= self.max_size:
+            # Recycle the least recently used surface
+            _, overlay = self.entries.popitem(last=False)
+        else:
+            overlay = pygame.Surface(self.size, pygame.SRCALPHA)
+
+        # Shade with the quantized light so an entry never depends on which
+        # frame happened to create it
+        if self.step > 0:
+            light_vector = tuple(k * self.step for k in key)
+        alpha = pygame.surfarray.pixels_alpha(overlay)
+        self.mask.shade(light_vector, alpha)
+        del alpha
+
+        self.entries[key] = overlay
+        return overlay
+
+    def nbytes(self):
+        w, h = self.size
+        return len(self.entries) * w * h * 4
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
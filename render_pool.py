@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# Optional thread pool for per-body work. Each planet updates and renders
+# into its own buffers (NumPy indexing and SDL blits release the GIL), then
+# the main thread replays the resulting blits onto the canvas in the same
+# order as the serial loop, so the picture is identical.
+
+def update_body(planet, ticks):
+    planet.update(ticks)
+
+def render_body(job):
+    planet, center_x, center_y, light_vector, scale = job
+    return planet.render(light_vector, scale)
+
+class RenderPool:
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render')
+
+    def update(self, planets, ticks=None):
+        # Every planet's update only touches that planet
+        planets = list(planets)
+        if ticks is None:
+            ticks = [1] * len(planets)
+        for _ in self.executor.map(update_body, planets, ticks):
+            pass
+
+    def draw(self, surface, jobs, capture=None):
+        # jobs: (planet, center_x, center_y, light_vector, scale) in draw order.
+        # A planet must appear at most once per call (its buffers are reused).
+        # capture(planet, light_vector, ops) sees every render (e.g. ImpostorCache.capture).
+        jobs = list(jobs)
+        for job, ops in zip(jobs, self.executor.map(render_body, jobs)):
+            planet, center_x, center_y, light_vector = job[:4]
+            planet.paint(surface, center_x, center_y, ops)
+            if capture is not None:
+                capture(planet, light_vector, ops)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,307 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import json
+import math
+import subprocess
+import sys
+import tempfile
+import time
+
+import pygame
+
+# Headless, deterministic replays of main(): a fixed seed, a scripted or
+# recorded input timeline and no frame cap. Each scenario runs in a fresh
+# process so its peak RSS is its own.
+#
+#   python replay.py                          # all canonical scenarios
+#   python replay.py --scenario sun_flyby --frames 300
+#   python replay.py --timeline recorded.json # from main.py --record
+#   python replay.py --no-count               # frame times without the allocation hooks
+#
+# Surface allocations are counted by Python-level hooks, which cost a few
+# microseconds per allocation inside the timed frames (--no-count turns
+# them off). Counted: pygame.Surface(...), and copy/subsurface/convert/
+# convert_alpha on surfaces made that way; image.frombuffer/frombytes/load;
+# transform.scale/smoothscale/scale2x without a destination surface,
+# rotate, rotozoom and flip; font.Font.render. Not counted: methods called
+# on surfaces pygame itself returned (the display surface, or the result of
+# a transform or image call), since pygame's own Surface type can't be
+# hooked; and surfaces made inside pygame internals.
+#
+# Timelines are JSON: {"seed": 3, "frames": 600, "events": [
+#   {"frame": 0, "hold": ["thrust", "left"]},  # held until the next "hold"
+#   {"frame": 90, "wheel": -3}]}               # mouse wheel steps (zoom)
+
+ACTIONS = {'thrust': pygame.K_w, 'left': pygame.K_a, 'right': pygame.K_d}
+WARMUP_FRAMES = 30
+
+class HeldKeys:
+    # Stands in for pygame.key.get_pressed() in Spaceship.handle_input
+    def __init__(self, held=()):
+        self.pressed = {ACTIONS[a] for a in held}
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+def autopilot(player, target, tolerance=6.0):
+    # Turn towards target and thrust once roughly facing it
+    dx = target[0] - player.pos.x
+    dy = target[1] - player.pos.y
+    # Ship angles: 0 is right, 90 is up (screen y points down)
+    want = math.degrees(math.atan2(-dy, dx))
+    diff = (want - player.angle + 180) % 360 - 180
+    held = []
+    if diff > tolerance:
+        held.append('left')
+    elif diff < -tolerance:
+        held.append('right')
+    if abs(diff) < 30:
+        held.append('thrust')
+    return held
+
+class Replay:
+    # Input source for main(). waypoints: names of bodies (or (x, y) points)
+    # the autopilot flies to in turn, used when the timeline holds no keys.
+    def __init__(self, name, frames, seed=0, events=(), waypoints=(), arrive=60.0):
+        self.name = name
+        self.frames = frames
+        self.seed = seed
+        self.events = sorted(events, key=lambda e: e['frame'])
+        self.waypoints = list(waypoints)
+        self.arrive = arrive
+        self.held = []
+        self.cursor = 0
+        self.frame_times = []
+        self.last_frame = None
+        # Optional callable sampled after every frame (e.g. an allocation count)
+        self.probe = None
+        self.samples = []
+
+    @classmethod
+    def load(cls, path, frames=None):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(os.path.basename(path), frames or data['frames'], data.get('seed', 0), data['events'])
+
+    def input(self, frame, player, positions):
+        # positions(name) -> (x, y) of a named body.
+        # Returns (pygame events, held keys) for this frame.
+        events = []
+        while self.cursor < len(self.events) and self.events[self.cursor]['frame'] <= frame:
+            event = self.events[self.cursor]
+            if 'hold' in event:
+                self.held = event['hold']
+            if 'wheel' in event:
+                events.append(pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=event['wheel']))
+            self.cursor += 1
+        if frame >= self.frames:
+            events.append(pygame.event.Event(pygame.QUIT))
+
+        held = self.held
+        if self.waypoints:
+            target = self.waypoints[0]
+            if isinstance(target, str):
+                target = positions(target)
+            if math.hypot(target[0] - player.pos.x, target[1] - player.pos.y) < self.arrive:
+                self.waypoints.pop(0)
+            held = autopilot(player, target)
+        return events, HeldKeys(held)
+
+    def frame_done(self):
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            self.frame_times.append(now - self.last_frame)
+        self.last_frame = now
+        if self.probe is not None:
+            self.samples.append(self.probe())
+
+class Recorder:
+    # Captures live input into a timeline Replay.load can play back
+    def __init__(self, path, seed):
+        self.path = path
+        self.seed = seed
+        self.events = []
+        self.held = []
+        self.frames = 0
+
+    def capture(self, frame, events, keys):
+        for event in events:
+            if event.type == pygame.MOUSEWHEEL:
+                self.events.append({'frame': frame, 'wheel': event.y})
+        held = [name for name, key in ACTIONS.items() if keys[key]]
+        # Arrow keys steer too
+        if keys[pygame.K_UP] and 'thrust' not in held:
+            held.append('thrust')
+        if keys[pygame.K_LEFT] and 'left' not in held:
+            held.append('left')
+        if keys[pygame.K_RIGHT] and 'right' not in held:
+            held.append('right')
+        if held != self.held:
+            self.events.append({'frame': frame, 'hold': held})
+            self.held = held
+        self.frames = frame + 1
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump({'seed': self.seed, 'frames': self.frames, 'events': self.events}, f, indent=1)
+
+# Canonical scenarios (seed 3 puts the terran start position in open space)
+SCENARIOS = {
+    # Fly straight through the sun's disc and out the other side
+    'sun_flyby': lambda: Replay('sun_flyby', 900, 3, waypoints=['sun', (0.0, 0.0), (-2000.0, 0.0)], arrive=150.0),
+    # Zoom all the way out, then cruise
+    'max_zoom_out': lambda: Replay('max_zoom_out', 600, 3, events=[
+        {'frame': 1, 'wheel': -40},
+        {'frame': 30, 'hold': ['thrust']},
+        {'frame': 300, 'hold': ['left', 'thrust']},
+    ]),
+    # Visit every planet, then the sun
+    'system_tour': lambda: Replay('system_tour', 3000, 3, events=[{'frame': 1, 'wheel': -10}],
+                                  waypoints=['lava', 'terran', 'gas_giant', 'ice', 'sun'], arrive=120.0),
+}
+
+def count_surfaces():
+    # Wraps the allocating entry points so every new surface is counted
+    # (see the top of this file for what is left out)
+    counter = [0]
+
+    class CountingSurface(pygame.Surface):
+        def __init__(self, *args, **kwargs):
+            counter[0] += 1
+            super().__init__(*args, **kwargs)
+
+        def copy(self):
+            counter[0] += 1
+            return super().copy()
+
+        def subsurface(self, *args):
+            counter[0] += 1
+            return super().subsurface(*args)
+
+        def convert(self, *args):
+            counter[0] += 1
+            return super().convert(*args)
+
+        def convert_alpha(self, *args):
+            counter[0] += 1
+            return super().convert_alpha(*args)
+    pygame.Surface = CountingSurface
+
+    class CountingFont(pygame.font.Font):
+        def render(self, *args, **kwargs):
+            counter[0] += 1
+            return super().render(*args, **kwargs)
+    pygame.font.Font = CountingFont
+
+    def counting(module, name, dest_index=None):
+        # dest_index: position of an optional destination surface; calls
+        # that pass one don't allocate
+        fn = getattr(module, name)
+        def wrapper(*args, **kwargs):
+            if dest_index is None or (len(args) <= dest_index and 'dest_surface' not in kwargs):
+                counter[0] += 1
+            return fn(*args, **kwargs)
+        setattr(module, name, wrapper)
+    counting(pygame.transform, 'scale', 2)
+    counting(pygame.transform, 'smoothscale', 2)
+    counting(pygame.transform, 'scale2x', 1)
+    counting(pygame.transform, 'rotate')
+    counting(pygame.transform, 'rotozoom')
+    counting(pygame.transform, 'flip')
+    counting(pygame.image, 'frombuffer')
+    counting(pygame.image, 'frombytes')
+    counting(pygame.image, 'load')
+    return counter
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def run_scenario(name, frames=None, count=True):
+    # Replays one scenario name or timeline path in this process
+    counter = count_surfaces() if count else None
+    import main as game
+    from benchmark import percentile
+
+    if name in SCENARIOS:
+        replay = SCENARIOS[name]()
+        if frames:
+            replay.frames = frames
+    else:
+        replay = Replay.load(name, frames)
+
+    if counter is not None:
+        replay.probe = lambda: counter[0]
+    game.main(seed=replay.seed, texture_cache=False, replay=replay)
+
+    times = sorted(replay.frame_times)
+    # Per-frame allocations once the first planets are built
+    steady = replay.samples[WARMUP_FRAMES:] if len(replay.samples) > WARMUP_FRAMES else replay.samples
+    steady_allocs = steady[-1] - steady[0] if len(steady) > 1 else 0
+    return {
+        'scenario': replay.name,
+        'frames': len(times),
+        'p50_ms': percentile(times, 0.50) * 1000,
+        'p95_ms': percentile(times, 0.95) * 1000,
+        'p99_ms': percentile(times, 0.99) * 1000,
+        'max_ms': times[-1] * 1000,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'surface_allocs': counter[0] if counter is not None else None,
+        'allocs_per_frame': steady_allocs / max(1, len(steady) - 1) if counter is not None else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay scripted input through main() headlessly and report frame times")
+    parser.add_argument('--scenario', nargs='+', choices=list(SCENARIOS), help="canonical scenarios (default: all)")
+    parser.add_argument('--timeline', nargs='+', default=[], metavar='FILE', help="recorded timelines to replay")
+    parser.add_argument('--frames', type=int, help="override the number of frames")
+    parser.add_argument('--out', help="write results as JSON to this file")
+    parser.add_argument('--no-count', action='store_true', help="don't hook surface allocations (no per-frame overhead)")
+    parser.add_argument('--worker', metavar='SCENARIO', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = run_scenario(args.worker, args.frames, not args.no_count)
+        with open(args.out, 'w') as f:
+            json.dump(result, f)
+        return 0
+
+    names = args.scenario or ([] if args.timeline else list(SCENARIOS))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, name in enumerate(names + args.timeline):
+            print(f'[{name}]', file=sys.stderr)
+            # Every scenario gets a fresh interpreter so peak RSS is its own
+            out = os.path.join(tmp, f'{i}.json')
+            command = [sys.executable, os.path.abspath(__file__), '--worker', name, '--out', out]
+            if args.frames:
+                command += ['--frames', str(args.frames)]
+            if args.no_count:
+                command.append('--no-count')
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+            with open(out) as f:
+                results.append(json.load(f))
+
+    print(f"{'scenario':<16}{'frames':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+          f"{'peak MiB':>10}{'surfaces':>10}{'per frame':>11}")
+    for r in results:
+        rss = f"{r['peak_rss_bytes'] / 2**20:.1f}" if r['peak_rss_bytes'] else '-'
+        allocs = r['surface_allocs'] if r['surface_allocs'] is not None else '-'
+        per_frame = f"{r['allocs_per_frame']:.2f}" if r['allocs_per_frame'] is not None else '-'
+        print(f"{r['scenario']:<16}{r['frames']:>8}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+              f"{r['max_ms']:>9.2f}{rss:>10}{allocs:>10}{per_frame:>11}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
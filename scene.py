@@ -0,0 +1,266 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pygame
+from planet import Planet, GENERATOR_VERSION, generate_base_map, texture_size
+from planet_builder import build_parts
+from geometry import registry
+from orbits import OrbitalState
+
+# Orbiting bodies held as flat arrays (an OrbitalState) plus a uniform grid
+# over their world positions, so a viewport query only looks at the bodies
+# in nearby cells. A body's Planet (texture, normals, clouds) is only built
+# once it comes near the viewport: its base map is generated in a worker
+# process and a few finished planets are assembled per frame, so a crowded
+# view never stalls a frame. Until then the body has no planet and callers
+# draw a placeholder. The least recently seen planets are released again
+# whenever the live planets exceed the memory budget.
+
+GRID_OFFSET = 1 << 20   # cell coordinates are shifted to be non-negative
+GRID_STRIDE = 1 << 21
+
+class SceneBody:
+    def __init__(self, index, config, seed, name=None):
+        self.index = index
+        self.config = config
+        self.seed = seed
+        self.name = name
+        self.radius = config.radius
+        self.planet = None
+        self.memory = 0
+        self.last_seen = -1
+        # Rotation is kept across a release so the body doesn't jump back
+        self.rotation_angle = 0.0
+        self.released_frame = 0
+
+class Scene:
+    # After this many broken pools base maps are generated in this process
+    MAX_POOL_FAILURES = 3
+
+    def __init__(self, cell_size=512, memory_budget=128 * 1024 * 1024, preload_margin=256,
+                 texture_cache=None, workers=None, builds_per_frame=2, max_pending=8, keep_ready_frames=30):
+        self.cell_size = cell_size
+        self.memory_budget = memory_budget
+        self.preload_margin = preload_margin
+        self.texture_cache = texture_cache
+        self.workers = workers or os.cpu_count() or 1
+        # Turning a finished base map into a Planet (projection, clouds, LOD)
+        # happens inside prepare(), so it counts against this frame
+        self.builds_per_frame = builds_per_frame
+        # Base maps queued or waiting to be collected at once; the rest are
+        # asked for again on later frames
+        self.max_pending = max_pending
+        # Finished base maps of bodies out of sight are kept this long
+        self.keep_ready_frames = keep_ready_frames
+        self.executor = None
+        self.pending = {}        # body index -> future of its base map pixels
+        self.pool_failures = 0
+        self.built_this_frame = 0
+
+        self.bodies = []
+        self.orbits = OrbitalState()
+        self.radius = np.zeros(0)
+        self.frame = 0
+
+        # Grid index: body indices sorted by packed cell key
+        self.grid_keys = None
+        self.grid_order = None
+        self.max_radius = 0.0
+        # Bodies drift out of the cell they were indexed in; queries are
+        # widened by the drift and the grid is rebuilt once it grows too big
+        self.drift = 0.0
+        self.max_drift = cell_size / 4
+
+        self.live = set()
+        self.live_bytes = 0
+        self.built = 0
+        self.released = 0
+
+    def add(self, config, seed, dist, speed, angle, name=None, parent=None):
+        # parent: the SceneBody a moon orbits (None orbits the star)
+        body = SceneBody(len(self.bodies), config, seed, name)
+        self.bodies.append(body)
+        self.orbits.add(dist, speed, angle, -1 if parent is None else parent.index)
+        self.grid_keys = None
+        return body
+
+    def advance(self):
+        self.orbits.advance()
+        # No body moves further than the largest per-frame step
+        self.drift += self.orbits.max_step
+        if self.grid_keys is None or self.drift > self.max_drift:
+            self.rebuild_index()
+        self.frame += 1
+        self.built_this_frame = 0
+
+    def cell_keys(self, cx, cy):
+        return (cy + GRID_OFFSET) * GRID_STRIDE + (cx + GRID_OFFSET)
+
+    def rebuild_index(self):
+        if len(self.radius) != len(self.bodies):
+            self.radius = np.array([b.radius for b in self.bodies], dtype=np.float64)
+        cx = np.floor(self.orbits.x / self.cell_size).astype(np.int64)
+        cy = np.floor(self.orbits.y / self.cell_size).astype(np.int64)
+        keys = self.cell_keys(cx, cy)
+        self.grid_order = np.argsort(keys, kind='stable')
+        self.grid_keys = keys[self.grid_order]
+        self.max_radius = float(self.radius.max()) if len(self.bodies) else 0.0
+        self.drift = 0.0
+
+    def query(self, left, top, right, bottom, margin=0.0):
+        # Indices of bodies whose disc (plus margin) overlaps the rectangle
+        if self.grid_keys is None:
+            self.rebuild_index()
+        if not len(self.bodies):
+            return np.zeros(0, dtype=np.intp)
+        pad = margin + self.max_radius + self.drift
+        c = self.cell_size
+        cx0, cx1 = int(math.floor((left - pad) / c)), int(math.floor((right + pad) / c))
+        cy0, cy1 = int(math.floor((top - pad) / c)), int(math.floor((bottom + pad) / c))
+
+        # Each grid row of the rectangle is one contiguous run of keys
+        rows = np.arange(cy0, cy1 + 1, dtype=np.int64)
+        lo = np.searchsorted(self.grid_keys, self.cell_keys(cx0, rows), 'left')
+        hi = np.searchsorted(self.grid_keys, self.cell_keys(cx1, rows), 'right')
+        runs = [self.grid_order[a:b] for a, b in zip(lo, hi) if b > a]
+        if not runs:
+            return np.zeros(0, dtype=np.intp)
+        candidates = np.concatenate(runs)
+
+        # Exact test against the current positions
+        r = self.radius[candidates] + margin
+        x = self.orbits.x[candidates]
+        y = self.orbits.y[candidates]
+        inside = (x + r > left) & (x - r < right) & (y + r > top) & (y - r < bottom)
+        return candidates[inside]
+
+    def prepare(self, indices):
+        # Mark these bodies as seen and get their planets on the way.
+        # Returns the bodies; those still being built have planet None.
+        bodies = [self.bodies[i] for i in indices]
+        for body in bodies:
+            body.last_seen = self.frame
+            if body.planet is None:
+                self.request(body)
+        return bodies
+
+    def request(self, body):
+        if self.built_this_frame >= self.builds_per_frame:
+            return
+        texture = None
+        future = self.pending.get(body.index)
+        if future is not None:
+            if not future.done():
+                return
+            del self.pending[body.index]
+            size = texture_size(body.config)
+            try:
+                texture = pygame.image.frombuffer(future.result(), size, 'RGB')
+            except Exception as e:
+                # The worker raised, or died and took the pool with it:
+                # build this one here
+                if isinstance(e, BrokenProcessPool):
+                    self.reset_pool()
+                texture = generate_base_map(body.config, body.seed, *size)
+            if self.texture_cache is not None:
+                self.texture_cache.store(self.cache_key(body), texture)
+        elif self.texture_cache is not None:
+            texture = self.texture_cache.load(self.cache_key(body), texture_size(body.config))
+        if texture is None and self.pool_failures >= self.MAX_POOL_FAILURES:
+            texture = generate_base_map(body.config, body.seed, *texture_size(body.config))
+        if texture is None:
+            if len(self.pending) >= self.max_pending:
+                return
+            # Generate the base map off the main thread
+            if self.executor is None:
+                # By then the render threads may be running, and a forked child
+                # can inherit one of their locks held: start workers fresh
+                self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                    mp_context=multiprocessing.get_context('forkserver'))
+            try:
+                self.pending[body.index] = self.executor.submit(build_parts, (body.config, body.seed))
+            except BrokenProcessPool:
+                self.reset_pool()
+            return
+
+        planet = Planet(body.config, body.seed, base_texture=texture)
+        # Catch up on the rotation and weather missed while released
+        # (long gaps take the closed-form fast forward)
+        planet.rotation_angle = body.rotation_angle
+        elapsed = self.frame - body.released_frame
+        if elapsed > 0:
+            planet.update(elapsed)
+        body.planet = planet
+        body.memory = planet.memory_bytes()
+        self.live.add(body.index)
+        self.live_bytes += body.memory
+        self.built += 1
+        self.built_this_frame += 1
+
+    def cache_key(self, body):
+        return self.texture_cache.key(body.config, body.seed, texture_size(body.config), GENERATOR_VERSION)
+
+    def release(self):
+        # Drop builds nobody wants any more: queued ones for bodies not seen
+        # this frame, finished ones that went unclaimed for a while
+        for i, future in list(self.pending.items()):
+            unseen = self.frame - self.bodies[i].last_seen
+            if unseen > 0 and (future.cancel() or (future.done() and unseen > self.keep_ready_frames)):
+                del self.pending[i]
+
+        # Drop the least recently seen planets until under the budget.
+        # Bodies seen this frame are never released.
+        if self.live_bytes <= self.memory_budget:
+            return
+        # Planets grow after creation (LOD levels, caches): re-measure first
+        self.live_bytes = 0
+        for i in self.live:
+            body = self.bodies[i]
+            body.memory = body.planet.memory_bytes()
+            self.live_bytes += body.memory
+        released = set()
+        for i in sorted(self.live, key=lambda i: self.bodies[i].last_seen):
+            if self.live_bytes <= self.memory_budget:
+                break
+            body = self.bodies[i]
+            if body.last_seen >= self.frame:
+                break
+            released |= body.planet.lod.radii()
+            body.rotation_angle = body.planet.rotation_angle
+            body.released_frame = self.frame
+            body.planet = None
+            self.live.discard(i)
+            self.live_bytes -= body.memory
+            body.memory = 0
+            self.released += 1
+        # Geometry of radii no remaining planet uses needn't be kept around
+        if released:
+            for i in self.live:
+                released -= self.bodies[i].planet.lod.radii()
+            registry.evict(released)
+
+    def screen_positions(self, indices, camera_x, camera_y):
+        # Canvas pixel positions of these bodies (truncated like int())
+        x = self.orbits.x[indices].astype(np.float64) - camera_x
+        y = self.orbits.y[indices].astype(np.float64) - camera_y
+        return x.astype(np.intp).tolist(), y.astype(np.intp).tolist()
+
+    def near(self, left, top, right, bottom):
+        # Bodies in or close to the viewport whose planets are built
+        bodies = self.prepare(self.query(left, top, right, bottom, self.preload_margin))
+        return [b for b in bodies if b.planet is not None]
+
+    def reset_pool(self):
+        # Drop a broken pool (a fresh one is made on the next request);
+        # bodies whose builds were lost ask for them again
+        self.close()
+        self.pending.clear()
+        self.pool_failures += 1
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
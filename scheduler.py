@@ -0,0 +1,81 @@
+import time
+import weakref
+from collections import deque
+
+class UpdateScheduler:
+    # Spends a per-frame time budget on Planet.update. Visible and near
+    # bodies are updated every frame no matter what; offscreen bodies take
+    # turns (round-robin) in whatever budget is left, at most once every
+    # offscreen_interval frames. A body that waited is handed all the frames
+    # it missed as ticks, so its rotation and weather never fall behind.
+    #
+    # Per frame: begin_frame(), tick()/tick_many() for the priority bodies,
+    # fill() with the offscreen ones, end_frame(). Bodies passed to neither
+    # are dormant; their first update afterwards fast-forwards all the
+    # ticks they slept through.
+    def __init__(self, budget_ms=8.0, offscreen_interval=8, history=240):
+        self.budget_ms = budget_ms
+        self.offscreen_interval = offscreen_interval
+        self.frame = 0
+        self.last_update = weakref.WeakKeyDictionary()
+        self.cursor = 0
+
+        self.frame_start = 0.0
+        self.used_ms = 0.0
+        self.history = deque(maxlen=history)
+        self.updated = 0
+        self.deferred = 0
+
+    def ticks(self, planet):
+        # Frames owed to this planet. A planet seen for the first time is
+        # current; from then on it is owed frames even if it only ever
+        # waits in fill().
+        return self.frame - self.last_update.setdefault(planet, self.frame - 1)
+
+    def begin_frame(self):
+        self.frame += 1
+        self.updated = 0
+        self.deferred = 0
+        self.frame_start = time.perf_counter()
+
+    def tick(self, planet):
+        planet.update(self.ticks(planet))
+        self.last_update[planet] = self.frame
+        self.updated += 1
+
+    def tick_many(self, planets, update_many):
+        # update_many(planets, ticks) updates a batch at once (e.g. RenderPool.update)
+        planets = list(planets)
+        update_many(planets, [self.ticks(p) for p in planets])
+        for planet in planets:
+            self.last_update[planet] = self.frame
+        self.updated += len(planets)
+
+    def fill(self, background):
+        # Offscreen bodies, round-robin, until the budget is spent
+        deadline = self.frame_start + self.budget_ms / 1000
+        background = list(background)
+        n = len(background)
+        for k in range(n):
+            planet = background[(self.cursor + k) % n]
+            if self.ticks(planet) < self.offscreen_interval:
+                continue
+            if time.perf_counter() >= deadline:
+                # Out of budget: the next frame starts from this body
+                self.cursor = (self.cursor + k) % n
+                self.deferred = sum(1 for p in background if self.ticks(p) >= self.offscreen_interval)
+                return
+            self.tick(planet)
+        self.cursor = 0
+
+    def end_frame(self):
+        self.used_ms = (time.perf_counter() - self.frame_start) * 1000
+        self.history.append(self.used_ms)
+
+    def usage(self):
+        # Fraction of the budget the last frame used (can exceed 1.0 when
+        # the priority bodies alone don't fit)
+        return self.used_ms / self.budget_ms if self.budget_ms else 0.0
+
+    def peak_usage(self):
+        return max(self.history) / self.budget_ms if self.history and self.budget_ms else 0.0
@@ -17,8 +17,10 @@ class Spaceship:
         self.friction = 0.96
         self.rotation_speed = 5.0
         
-    def handle_input(self):
-        keys = pygame.key.get_pressed()
+    def handle_input(self, keys=None):
+        # keys: anything indexable like pygame.key.get_pressed() (replays pass their own)
+        if keys is None:
+            keys = pygame.key.get_pressed()
         
         # Reset acceleration
         self.acc.x = 0
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+import numpy as np
+import pygame
+
+# Parallax layers: (depth, stars per px^2, (min grey, max grey)).
+# Depth is how far a layer moves relative to the camera (0 = fixed).
+DEFAULT_LAYERS = [
+    (0.02, 0.0003, (70, 130)),
+    (0.05, 0.0004, (100, 200)),
+    (0.12, 0.0001, (160, 230)),
+]
+
+def mix64(x):
+    # splitmix64 finalizer on uint64 arrays (wraps on overflow by design)
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+class Starfield:
+    # Infinite starfield. Each layer's space is cut into square tiles and
+    # the stars of a tile are a pure hash of (seed, layer, tile x, tile y),
+    # so panning and zooming only ever reveal more of the same sky. Tiles are
+    # built in vectorized batches and kept in an LRU; each frame all visible
+    # stars of all layers go into the canvas with a single scatter write.
+    def __init__(self, seed=0, layers=DEFAULT_LAYERS, tile_size=256, max_tiles=4096):
+        self.seed = seed
+        self.layers = list(layers)
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.tiles = OrderedDict()
+        # Per layer: tile range of the last frame and its concatenated stars
+        self.visible = [None] * len(self.layers)
+        self.grey_lut = None
+        self.lut_format = None
+
+    def build_tiles(self, layer, keys):
+        # Stars for many tiles at once: every tile has the same number of
+        # candidate slots and each slot exists with probability 1/2.
+        depth, density, (lo, hi) = self.layers[layer]
+        t = self.tile_size
+        slots = max(1, int(round(2 * density * t * t)))
+
+        tx = np.array([k[0] for k in keys], dtype=np.int64).astype(np.uint64) & np.uint64(0xFFFFFFFF)
+        ty = np.array([k[1] for k in keys], dtype=np.int64).astype(np.uint64) & np.uint64(0xFFFFFFFF)
+        salt = ((self.seed & 0xFFFFFFFF) * 0x9E3779B97F4A7C15 ^ layer * 0xD1B54A32D192ED03) & 0xFFFFFFFFFFFFFFFF
+        tile_hash = mix64(np.uint64(salt) ^ (tx << np.uint64(32) | ty))
+        h = mix64(tile_hash[:, None] + np.arange(slots, dtype=np.uint64)[None, :] * np.uint64(0x9E3779B97F4A7C15))
+
+        x = ((h & np.uint64(0xFFFF)).astype(np.float64) / 65536.0) * t
+        y = (((h >> np.uint64(16)) & np.uint64(0xFFFF)).astype(np.float64) / 65536.0) * t
+        exists = ((h >> np.uint64(32)) & np.uint64(1)).astype(bool)
+        grey = lo + (((h >> np.uint64(40)) & np.uint64(0xFF)).astype(np.int64) * (hi - lo + 1) >> 8)
+
+        for i, key in enumerate(keys):
+            keep = exists[i]
+            self.tiles[(layer,) + key] = (x[i][keep] + key[0] * t, y[i][keep] + key[1] * t, grey[i][keep])
+        while len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+
+    def layer_stars(self, layer, tile_range):
+        cached = self.visible[layer]
+        if cached is not None and cached[0] == tile_range:
+            return cached[1]
+
+        tx0, tx1, ty0, ty1 = tile_range
+        keys = [(tx, ty) for tx in range(tx0, tx1 + 1) for ty in range(ty0, ty1 + 1)]
+        missing = [k for k in keys if (layer,) + k not in self.tiles]
+        if missing:
+            self.build_tiles(layer, missing)
+        parts = []
+        for k in keys:
+            key = (layer,) + k
+            self.tiles.move_to_end(key)
+            parts.append(self.tiles[key])
+        stars = tuple(np.concatenate(col) for col in zip(*parts))
+        self.visible[layer] = (tile_range, stars)
+        return stars
+
+    def lut(self, surface):
+        # Grey level -> mapped pixel value for this surface format
+        fmt = (surface.get_bitsize(), surface.get_masks())
+        if fmt != self.lut_format:
+            self.grey_lut = np.array([surface.map_rgb((g, g, g)) for g in range(256)], dtype=np.uint32)
+            self.lut_format = fmt
+        return self.grey_lut
+
+    def draw(self, surface, center_x, center_y):
+        # center_x/center_y: world position shown at the middle of `surface`
+        w, h = surface.get_size()
+        t = self.tile_size
+        xs, ys, greys = [], [], []
+        for layer, (depth, _, _) in enumerate(self.layers):
+            # Layer-space rectangle covered by the surface
+            left = center_x * depth - w / 2
+            top = center_y * depth - h / 2
+            tile_range = (int(left // t), int((left + w) // t), int(top // t), int((top + h) // t))
+            x, y, grey = self.layer_stars(layer, tile_range)
+            xs.append(np.floor(x - left).astype(np.int64))
+            ys.append(np.floor(y - top).astype(np.int64))
+            greys.append(grey)
+
+        x = np.concatenate(xs)
+        y = np.concatenate(ys)
+        grey = np.concatenate(greys)
+        on_screen = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+
+        pixels = pygame.surfarray.pixels2d(surface)
+        pixels[x[on_screen], y[on_screen]] = self.lut(surface)[grey[on_screen]]
+        del pixels
@@ -0,0 +1,72 @@
+import pygame
+
+# Secondary views of the home system (the corner minimap and the full
+# system map) drawn in window space on top of the scaled game canvas.
+# Bodies are drawn from impostor sprites rather than rendered again, and
+# are enlarged so they stay recognisable at map scale. Bodies whose
+# planets aren't built, or that end up only a few pixels wide, are dots.
+
+class MapView:
+    def __init__(self, rect, span, body_scale=4.0, min_sprite=6, background=(0, 0, 0, 170),
+                 border=(120, 120, 140)):
+        # rect: window area; span: world distance from the centre to the
+        # nearer edge of the view
+        self.rect = pygame.Rect(rect)
+        self.span = span
+        self.body_scale = body_scale
+        self.min_sprite = min_sprite
+        self.border = border
+        self.panel = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.panel.fill(background)
+        self.drawn = 0
+
+    def pixels_per_unit(self):
+        return min(self.rect.w, self.rect.h) / (2 * self.span)
+
+    def draw(self, screen, center, scene, sun, player, impostors):
+        # center: world point at the middle of the view
+        k = self.pixels_per_unit()
+        half_w, half_h = self.rect.w / 2 / k, self.rect.h / 2 / k
+        cx, cy = center
+        mid_x, mid_y = self.rect.centerx, self.rect.centery
+
+        screen.blit(self.panel, self.rect)
+        clip = screen.get_clip()
+        screen.set_clip(self.rect)
+        self.drawn = 0
+
+        def body(planet, config, radius, x, y, light):
+            sx = int(mid_x + (x - cx) * k)
+            sy = int(mid_y + (y - cy) * k)
+            size = int(2 * radius * k * self.body_scale)
+            if planet is not None and size >= self.min_sprite:
+                sprite = impostors.sprite(planet, light, size)
+                w = sprite.get_width()
+                screen.blit(sprite, (sx - w // 2, sy - w // 2))
+            else:
+                color = planet.lod.flat_color(light) if planet is not None else config.c_ocean_shallow
+                if size >= 3:
+                    pygame.draw.circle(screen, color, (sx, sy), size // 2)
+                else:
+                    screen.fill(color, (sx, sy, 2, 2))
+            self.drawn += 1
+
+        reach = sun.radius * self.body_scale
+        if abs(cx) < half_w + reach and abs(cy) < half_h + reach:
+            body(sun, sun.config, sun.radius, 0.0, 0.0, (0, 0, 1))
+
+        # Enlarged bodies may poke into view from just outside it
+        margin = scene.max_radius * self.body_scale
+        for i in scene.query(cx - half_w, cy - half_h, cx + half_w, cy + half_h, margin):
+            b = scene.bodies[i]
+            x, y = float(scene.orbits.x[i]), float(scene.orbits.y[i])
+            body(b.planet, b.config, b.radius, x, y, scene.orbits.light(i))
+
+        # The ship
+        px = int(mid_x + (player.pos.x - cx) * k)
+        py = int(mid_y + (player.pos.y - cy) * k)
+        pygame.draw.line(screen, player.color, (px - 4, py), (px + 4, py))
+        pygame.draw.line(screen, player.color, (px, py - 4), (px, py + 4))
+
+        screen.set_clip(clip)
+        pygame.draw.rect(screen, self.border, self.rect, 1)
@@ -0,0 +1,194 @@
+import numpy as np
+import pygame
+
+# Vectorized terrain generator: fractal value noise (fBm) that wraps
+# seamlessly around the longitude, domain-warped by a second low-frequency
+# noise and mapped onto the same four palette colours as the walker
+# generator. Interpolation is separable: each octave's lattice is first
+# interpolated along x into a few full-width rows, then the map is filled
+# a band of rows at a time (every octave of a band while it is still in
+# cache). Only the height field and the warped height are full-size float
+# arrays; the warp noise, the colour jitter and the palette indices live in
+# band-sized buffers.
+
+BASE_CELLS = 4        # lattice rows of the first octave
+WARP_STRENGTH = 0.04  # warp displacement as a fraction of the map height
+SHADES = 8            # brightness variants per palette colour
+SHADE_RANGE = 10      # +- colour jitter, like vary_color() in the walker
+BAND = 32             # map rows filled per step
+
+def smoothstep(t):
+    return t * t * (3.0 - 2.0 * t)
+
+def lattice_rows(rng, w, cells_x, cells_y, amplitude):
+    # Random lattice interpolated along x only: (cells_y + 1, w) rows,
+    # periodic in x. Returns the rows and the row-to-row differences.
+    lattice = rng.random((cells_y + 1, cells_x), dtype=np.float32) * (2.0 * amplitude) - amplitude
+    u = np.arange(w, dtype=np.float32) * np.float32(cells_x / w)
+    i0 = u.astype(np.intp)
+    t = smoothstep(u - np.floor(u))
+    i1 = (i0 + 1) % cells_x
+    # Gather along the contiguous axis so the rows come out C-ordered
+    lattice = np.ascontiguousarray(lattice.T)
+    rows = lattice[i0] + (lattice[i1] - lattice[i0]) * t[:, None]
+    rows = np.ascontiguousarray(rows.T)
+    return rows, rows[1:] - rows[:-1]
+
+class Octave:
+    # One octave of periodic value noise: the x-interpolated lattice rows,
+    # and for every map row the lattice row above it and the y weight
+    def __init__(self, rng, w, h, cells_x, cells_y, amplitude):
+        self.rows, self.diffs = lattice_rows(rng, w, cells_x, cells_y, amplitude)
+        if h % cells_y == 0:
+            # Every lattice row spans the same number of map rows
+            k = h // cells_y
+            self.above = np.repeat(np.arange(cells_y, dtype=np.intp), k)
+            s = smoothstep(np.arange(k, dtype=np.float32) / np.float32(k))
+            self.weight = np.tile(s, cells_y)
+        else:
+            v = np.arange(h, dtype=np.float32) * np.float32(cells_y / h)
+            self.above = v.astype(np.intp)
+            self.weight = smoothstep(v - np.floor(v))
+
+class Fbm:
+    # stretch > 1 makes features longer along x (gas giant bands). All
+    # lattices are drawn up front, so the map can be filled in any order.
+    def __init__(self, rng, w, h, octaves, stretch, base_cells=BASE_CELLS):
+        self.w = w
+        self.h = h
+        self.octaves = []
+        amplitude = 1.0
+        cells_y = base_cells
+        for _ in range(octaves):
+            if cells_y > h:
+                break
+            # Equirectangular maps are twice as wide as tall
+            cells_x = max(1, min(w, int(round(2 * cells_y / stretch))))
+            self.octaves.append(Octave(rng, w, h, cells_x, cells_y, amplitude))
+            amplitude *= 0.5
+            cells_y *= 2
+
+    def fill(self, out, r0, tmp):
+        # out = the noise of map rows r0 .. r0 + len(out); tmp: scratch of
+        # the same shape
+        r1 = r0 + len(out)
+        if not self.octaves:
+            out.fill(0.0)
+            return out
+        for n, octave in enumerate(self.octaves):
+            above = octave.above[r0:r1]
+            weight = octave.weight[r0:r1, None]
+            target = out if n == 0 else tmp
+            if above[0] == above[-1]:
+                # The band lies within one lattice row: broadcast, no gathers
+                j = above[0]
+                np.multiply(octave.diffs[j], weight, out=target)
+                if n:
+                    out += tmp
+                out += octave.rows[j]
+                continue
+            np.take(octave.diffs, above, axis=0, out=target)
+            target *= weight
+            if n:
+                out += tmp
+            np.take(octave.rows, above, axis=0, out=tmp)
+            out += tmp
+        return out
+
+    def render(self, out=None, band=BAND):
+        # The whole (h, w) field
+        if out is None:
+            out = np.empty((self.h, self.w), dtype=np.float32)
+        tmp = np.empty((min(band, self.h), self.w), dtype=np.float32)
+        for r0 in range(0, self.h, band):
+            rows = out[r0:r0 + band]
+            self.fill(rows, r0, tmp[:len(rows)])
+        return out
+
+def fbm(rng, w, h, octaves, stretch, base_cells=BASE_CELLS):
+    return Fbm(rng, w, h, octaves, stretch, base_cells).render()
+
+def generate_noise_map(config, seed, w, h):
+    # Deterministic: same seed + config + size always gives the same map
+    rng = np.random.default_rng(seed)
+    stretch = max(1.0, config.walker_x_var / max(1, config.walker_y_var))
+
+    # Lattices in a fixed order: terrain, warp, jitter
+    terrain = Fbm(rng, w, h, config.noise_octaves, stretch)
+    warp_noise = Fbm(rng, w, h, 2, stretch)
+    jitter_noise = Fbm(rng, w, h, 1, stretch, base_cells=max(1, h // 8))
+
+    height = terrain.render().ravel()
+
+    # Band-sized scratch buffers
+    band = min(BAND, h)
+    field = np.empty((band, w), dtype=np.float32)
+    tmp = np.empty((band, w), dtype=np.float32)
+    src = np.empty((band, w), dtype=np.int32)
+    xs = np.empty((band, w), dtype=np.int32)
+    cols = np.arange(w, dtype=np.float32)
+    shift = w // 3
+
+    # Domain warp: sample the height field at coordinates displaced by a
+    # smooth noise (x wraps, y clamps at the poles). The y displacement
+    # reads the same field a third of the way round, which is uncorrelated
+    # at this frequency and saves two octaves.
+    amount = WARP_STRENGTH * h
+    warped = np.empty((h, w), dtype=np.float32)
+    for r0 in range(0, h, band):
+        r1 = min(h, r0 + band)
+        n = r1 - r0
+        f, t, s, x = field[:n], tmp[:n], src[:n], xs[:n]
+        warp_noise.fill(f, r0, t)
+        # np.roll(f, shift, axis=1), scaled and offset by the row
+        t[:, shift:] = f[:, :w - shift]
+        t[:, :shift] = f[:, w - shift:]
+        t *= amount
+        t += np.arange(r0, r1, dtype=np.float32)[:, None]
+        np.clip(t, 0, h - 1, out=t)
+        np.copyto(s, t, casting='unsafe')
+        s *= w
+        f *= amount * stretch
+        f += cols
+        np.copyto(x, f, casting='unsafe')
+        x %= w
+        s += x
+        np.take(height, s, out=warped[r0:r1])
+    del height
+
+    # Sea level from the requested land fraction, measured on a subsample
+    sample = warped[::8, ::8].ravel()
+    coast, sea, peak = np.quantile(sample, [max(0.0, 1.0 - config.noise_land * 1.3),
+                                            1.0 - config.noise_land,
+                                            1.0 - config.noise_land * 0.3])
+
+    palette = np.zeros((4 * SHADES, 4), dtype=np.uint8)
+    offsets = np.linspace(-SHADE_RANGE, SHADE_RANGE, SHADES)
+    for k, color in enumerate((config.c_ocean_deep, config.c_ocean_shallow,
+                               config.c_land_main, config.c_land_highlight)):
+        palette[k * SHADES:(k + 1) * SHADES, :3] = np.clip(np.array(color)[None, :] + offsets[:, None], 0, 255)
+    palette = palette.view(np.uint32).ravel()
+
+    # Palette index per texel: small brightness jitter from one fine,
+    # independent octave, plus SHADES for every level the height is above
+    # (0 deep ocean, 1 shallow water, 2 land, 3 highlight). One 32-bit
+    # lookup per texel, straight into an RGBX buffer the surface keeps.
+    rgbx = np.empty((h, w), dtype=np.uint32)
+    index = np.empty((band, w), dtype=np.uint8)
+    above = np.empty((band, w), dtype=np.bool_)
+    step = above.view(np.uint8)
+    for r0 in range(0, h, band):
+        r1 = min(h, r0 + band)
+        n = r1 - r0
+        jitter, i, a, st = field[:n], index[:n], above[:n], step[:n]
+        jitter_noise.fill(jitter, r0, tmp[:n])
+        jitter += 1.0
+        jitter *= SHADES / 2
+        np.clip(jitter, 0, SHADES - 1, out=jitter)
+        np.copyto(i, jitter, casting='unsafe')
+        for level in (coast, sea, peak):
+            np.greater_equal(warped[r0:r1], level, out=a)
+            st *= np.uint8(SHADES)
+            i += st
+        np.take(palette, i, out=rgbx[r0:r1])
+    return pygame.image.frombuffer(rgbx, (w, h), 'RGBX')
@@ -0,0 +1,41 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import unittest
+import numpy as np
+import pygame
+from planet import CloudManager
+
+# Clouds are authored in texels of a 256x128 map; larger maps must scale
+# them so the share of the planet they cover stays about the same.
+
+def coverage(w, h, seeds=range(8), ticks=200):
+    shares = []
+    for seed in seeds:
+        clouds = CloudManager(w, h, 0.003, (230, 240, 255), 15, rng=np.random.default_rng(seed))
+        for t in range(ticks):
+            clouds.step((t * 0.01) % 1.0)
+        clouds.fast_forward(2000, 0.0, 0.01)
+        clouds.rasterize()
+        shares.append(np.count_nonzero(clouds.coverage) / (w * h))
+    return float(np.mean(shares))
+
+class CloudCoverageTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pygame.init()
+
+    def test_coverage_independent_of_texture_size(self):
+        reference = coverage(256, 128)
+        self.assertGreater(reference, 0.01)
+        for w, h in ((512, 256), (1024, 512), (2048, 1024)):
+            share = coverage(w, h)
+            self.assertLess(abs(share - reference) / reference, 0.25, f'{w}x{h}: {share:.4f} vs {reference:.4f}')
+
+    def test_speed_scales_with_width(self):
+        small = CloudManager(256, 128, 0.003, (255, 255, 255), 5, rng=np.random.default_rng(1))
+        large = CloudManager(2048, 1024, 0.003, (255, 255, 255), 5, rng=np.random.default_rng(1))
+        np.testing.assert_allclose(large.speed / large.w, small.speed / small.w)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+import pygame
+from planet import BASE_MAP_FIELDS
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'pixel_planet', 'textures')
+
+class TextureCache:
+    # Content-addressed store of generated base maps. Each entry is the raw
+    # RGB pixel buffer of one texture, named after a hash of everything that
+    # determines its content, and loaded back by memory-mapping the file
+    # (no decoding step). The directory is kept under max_bytes by dropping
+    # the least recently used entries. Writes only add to a running total;
+    # the directory is scanned once it goes over, and trimmed to low_water
+    # of max_bytes so the next few writes don't scan again.
+    EXT = '.rgb'
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024, low_water=0.9):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.total_bytes = None  # counted on the first write
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(config, seed, size, generator_version):
+        # Only the config fields the base map is generated from
+        payload = {
+            'config': {name: getattr(config, name) for name in BASE_MAP_FIELDS},
+            'seed': seed,
+            'size': list(size),
+            'generator': generator_version,
+        }
+        blob = json.dumps(payload, sort_keys=True).encode()
+        return hashlib.sha256(blob).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.EXT)
+
+    def load(self, key, size):
+        path = self.path(key)
+        w, h = size
+        try:
+            size_bytes = os.path.getsize(path)
+            if size_bytes != w * h * 3:
+                # Truncated or stale entry
+                os.remove(path)
+                if self.total_bytes is not None:
+                    self.total_bytes -= size_bytes
+                self.misses += 1
+                return None
+            # Copy-on-write map: the file is never modified through it
+            pixels = np.memmap(path, dtype=np.uint8, mode='c')
+            os.utime(path)  # mark as recently used
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pygame.image.frombuffer(pixels, (w, h), 'RGB')
+
+    def store(self, key, surface):
+        data = pygame.image.tobytes(surface, 'RGB')
+        if self.total_bytes is None:
+            self.total_bytes = self.size_bytes()
+        path = self.path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        # Write to a temp file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.total_bytes += len(data) - replaced
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.EXT):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        # The running total may be off (other processes share the directory):
+        # recount before dropping anything
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * self.low_water
+            entries.sort()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+        self.total_bytes = total
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.total_bytes = 0